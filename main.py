@@ -0,0 +1,18 @@
+# main.py
+#
+# Entry point for the player and for the PyInstaller build.
+#
+# The macro builder pool spawns its worker processes, and each worker
+# re-runs this script (as __mp_main__, or as the frozen exe). So nothing
+# here is imported at module level: the GUI, PyQt5 and keyboard are only
+# loaded under the __main__ guard, and workers import just midi_tools.
+import multiprocessing
+
+if __name__ == "__main__":
+    # Needed for the macro worker processes when frozen into an exe; in a
+    # worker this runs the task and exits before the GUI is imported.
+    multiprocessing.freeze_support()
+
+    from wind_instrument_gui import main
+
+    main()
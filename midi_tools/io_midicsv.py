@@ -1,59 +1,172 @@
 # midi_tools/io_midicsv.py
-import chardet
 import py_midicsv as pm
 
-def detect_encoding(path):
-    encoding_type = chardet.detect(open(path, "rb").read())["encoding"]
-    return encoding_type
+# Event-type codes stored in the "code" column of a loaded midicsv table.
+EV_NONE = 0       # blank line, comment or malformed record
+EV_NOTE_ON = 1
+EV_NOTE_OFF = 2
+EV_TEMPO = 3
+EV_HEADER = 4
+EV_OTHER = 5      # any other data record, written back verbatim
+
+EVENT_CODES = {
+    "Note_on_c": EV_NOTE_ON,
+    "Note_off_c": EV_NOTE_OFF,
+    "Tempo": EV_TEMPO,
+    "Header": EV_HEADER,
+}
+
+NOTE_EVENT_NAMES = {
+    EV_NOTE_ON: "Note_on_c",
+    EV_NOTE_OFF: "Note_off_c",
+}
+
+
+def parse_midicsv(lines):
+    """
+    Parse midicsv text lines (without trailing newlines) into a
+    column-oriented table, one row per line.
+
+    Returns a dict of parallel lists:
+        "code"      event-type code (EV_* constants)
+        "track"     track number (0 for non-data lines)
+        "time"      absolute time in ticks (0 for non-data lines)
+        "channel"   \
+        "pitch"      > parsed note arguments (0 for non-note lines)
+        "velocity"  /
+        "line"      text written back for non-note lines (None for notes)
+
+    Note arguments are parsed to ints once here, so later passes never
+    have to re-split or re-parse the CSV text.
+    """
+    code = []
+    track_col = []
+    time_col = []
+    channel_col = []
+    pitch_col = []
+    velocity_col = []
+    line_col = []
+
+    get_code = EVENT_CODES.get
+
+    for raw in lines:
+        # int() ignores surrounding whitespace, so numeric fields don't
+        # need stripping; only the record type and comment check do.
+        parts = raw.split(",")
+        lead = parts[0].lstrip()[:1]
+
+        if len(parts) < 3 or lead == "#" or lead == ";":
+            code.append(EV_NONE)
+            track_col.append(0)
+            time_col.append(0)
+            channel_col.append(0)
+            pitch_col.append(0)
+            velocity_col.append(0)
+            line_col.append(raw)
+            continue
+
+        ev_code = get_code(parts[2].strip(), EV_OTHER)
+
+        track_col.append(int(parts[0]))
+        time_col.append(int(parts[1]))
+
+        if (ev_code == EV_NOTE_ON or ev_code == EV_NOTE_OFF) and len(parts) == 6:
+            # Note_on_c / Note_off_c: channel, pitch, velocity
+            code.append(ev_code)
+            channel_col.append(int(parts[3]))
+            pitch_col.append(int(parts[4]))
+            velocity_col.append(int(parts[5]))
+            line_col.append(None)
+            continue
+
+        if ev_code == EV_NOTE_ON or ev_code == EV_NOTE_OFF:
+            # Unusual argument count: keep it as an opaque record.
+            ev_code = EV_OTHER
+
+        code.append(ev_code)
+        channel_col.append(0)
+        pitch_col.append(0)
+        velocity_col.append(0)
+        line_col.append(", ".join([p.strip() for p in parts]))
+
+    return {
+        "code": code,
+        "track": track_col,
+        "time": time_col,
+        "channel": channel_col,
+        "pitch": pitch_col,
+        "velocity": velocity_col,
+        "line": line_col,
+    }
+
+
+def split_midicsv_text(text):
+    """Split midicsv text into lines without their trailing newlines."""
+    lines = text.split("\n")
+
+    if lines[-1] == "":
+        # Trailing newline at end of file, not an extra empty line.
+        lines.pop()
+
+    return lines
+
 
 def load_midicsv(path):
-    events = []
-    with open(path, "r", newline="", encoding=detect_encoding(path)) as f:
-        for line in f:
-            raw = line.rstrip("\n")
-            striped = raw.strip()
-
-            if striped == "" or striped.startswith("#") or striped.startswith(";"):
-                events.append({"raw_line": raw, "is_data": False})
-                continue
-
-            parts = [p.strip() for p in raw.split(",")]
-            if len(parts) < 3:
-                events.append({"raw_line": raw, "is_data": False})
-                continue
-
-            track = int(parts[0])
-            time = int(parts[1])
-            etype = parts[2]
-            args = parts[3:]
-
-            events.append({
-                "raw_line": raw,
-                "is_data": True,
-                "track": track,
-                "time": time,
-                "type": etype,
-                "args": args
-            })
-    return events
+    """Load a midicsv file into the column table described in parse_midicsv."""
+    # midicsv output is plain text we write ourselves as UTF-8; anything
+    # undecodable (e.g. odd bytes in a title) is replaced, not fatal.
+    # The raw bytes are read and decoded in one go, bypassing the text
+    # layer's chunked decoding, then split once rather than line by line.
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8", errors="replace")
+
+    return parse_midicsv(split_midicsv_text(text))
+
+
+def event_args(events, i):
+    """Return the argument fields of a non-note data row as stripped strings."""
+    return [p.strip() for p in events["line"][i].split(",")[3:]]
+
+
+def format_midicsv(events):
+    """Render a column table back into midicsv text lines (no newlines)."""
+    names = NOTE_EVENT_NAMES
+    return [
+        text if text is not None
+        else "%d, %d, %s, %d, %d, %d" % (track, time, names[code], channel, pitch, velocity)
+        for code, track, time, channel, pitch, velocity, text in zip(
+            events["code"],
+            events["track"],
+            events["time"],
+            events["channel"],
+            events["pitch"],
+            events["velocity"],
+            events["line"],
+        )
+    ]
 
 
 def write_midicsv(events, outpath):
+    lines = format_midicsv(events)
     with open(outpath, "w", encoding="utf-8", newline="\n") as f:
-        for ev in events:
-            if not ev.get("is_data"):
-                f.write(ev["raw_line"] + "\n")
-                continue
+        if lines:
+            # One write of the whole file instead of one per event.
+            f.write("\n".join(lines) + "\n")
+
+
+def midi_to_csv_lines(midi_path):
+    """Convert a MIDI file to midicsv text lines in memory (no newlines)."""
+    return split_midicsv_text("".join(pm.midi_to_csv(midi_path)))
+
 
-            line = f"{ev['track']}, {ev['time']}, {ev['type']}"
-            for a in ev["args"]:
-                line += f", {a}"
-            f.write(line + "\n")
+def midi_to_events(midi_path):
+    """Convert a MIDI file straight into a column table, without a CSV file."""
+    return parse_midicsv(midi_to_csv_lines(midi_path))
 
 
 def midi_to_csv(midi_path, csv_out):
     csv_lines = pm.midi_to_csv(midi_path)
-    with open(csv_out, "w", encoding=detect_encoding(midi_path)) as f:
+    with open(csv_out, "w", encoding="utf-8") as f:
         f.writelines(csv_lines)
 
 
@@ -1,103 +1,30 @@
 # midi_tools/macro.py
-#
-# from .io_midicsv import load_midicsv
-# from .tempo import extract_tempo_map, ticks_to_ms
-# from .pitch_to_keymap import pitch_to_key
-#
-#
-# def csv_to_keystroke_macro(csv_path: str):
-#     """
-#     Convert a processed midicsv file into a list of keystroke macro events.
-#
-#     Each macro event is:
-#         {"time": seconds_from_start, "key": "shift+q", "pitch": 72, "channel": 0}
-#     """
-#     events = load_midicsv(csv_path)
-#     division, tempo_map = extract_tempo_map(events)
-#
-#     macro = []
-#
-#     for ev in events:
-#         if not ev.get("is_data"):
-#             continue
-#         if ev["type"] != "Note_on_c":
-#             continue
-#
-#         # Note_on_c: channel, pitch, velocity
-#         channel = int(ev["args"][0])
-#         pitch   = int(ev["args"][1])
-#         vel     = int(ev["args"][2])
-#
-#         # Ignore 0-velocity Note_on (these are Note_offs in some MIDI styles)
-#         if vel <= 0:
-#             continue
-#
-#         key_combo = pitch_to_key(pitch)
-#         if key_combo is None:
-#             # Outside 3-octave playable range → skip
-#             continue
-#
-#         t_seconds = ticks_to_ms(ev["time"], tempo_map, division) / 1000.0
-#
-#         macro.append({
-#             "time":    t_seconds,
-#             "key":     key_combo,
-#             "pitch":   pitch,
-#             "channel": channel,
-#         })
-#
-#     macro.sort(key=lambda x: x["time"])
-#     return macro
-#
-#
-# def write_python_macro_script(macro, script_path: str):
-#     """
-#     Write a standalone Python script that can play this macro using the
-#     'keyboard' library.
-#     """
-#     lines = []
-#     lines.append("# Auto-generated macro script")
-#     lines.append("import time")
-#     lines.append("import keyboard")
-#     lines.append("")
-#     lines.append("macro = [")
-#
-#     for ev in macro:
-#         lines.append(
-#             f"    {{'time': {ev['time']:.6f}, 'key': {ev['key']!r}}},"
-#         )
-#
-#     lines.append("]")
-#     lines.append("")
-#     lines.append("def play():")
-#     lines.append("    if not macro:")
-#     lines.append("        print('Macro is empty – nothing to play.')")
-#     lines.append("        return")
-#     lines.append("")
-#     lines.append("    start_time = time.time()")
-#     lines.append("    for event in macro:")
-#     lines.append("        target = event['time']")
-#     lines.append("        key = event['key']")
-#     lines.append("        now = time.time() - start_time")
-#     lines.append("        delay = target - now")
-#     lines.append("        if delay > 0:")
-#     lines.append("            time.sleep(delay)")
-#     lines.append("        keyboard.send(key)")
-#     lines.append("")
-#     lines.append("if __name__ == '__main__':")
-#     lines.append("    input('Focus your digital instrument window, then press Enter to start...')")
-#     lines.append("    play()")
-#     lines.append("")
-#
-#     with open(script_path, "w", encoding="utf-8") as f:
-#         f.write("\n".join(lines))
+import struct
+from array import array
 
+from midi_tools.io_midicsv import EV_NOTE_ON, load_midicsv
+from midi_tools.tempo import extract_tempo_map, tempo_map_for_path, ticks_to_ms_many
+from midi_tools.pitch_to_keymap import KEY_TABLE
 
-# midi_tools/macro.py
 
-from midi_tools.io_midicsv import load_midicsv
-from midi_tools.tempo import extract_tempo_map, ticks_to_ms
-from midi_tools.pitch_to_keymap import pitch_to_key
+class MacroEvent:
+    """
+    One keystroke in a macro: press `key` at `time` seconds from the start.
+
+    Uses __slots__ so large macros don't pay for a dict per note.
+    """
+    __slots__ = ("time", "key", "pitch", "channel")
+
+    def __init__(self, time, key, pitch, channel):
+        self.time = time
+        self.key = key
+        self.pitch = pitch
+        self.channel = channel
+
+    def __repr__(self):
+        return (f"MacroEvent(time={self.time!r}, key={self.key!r}, "
+                f"pitch={self.pitch!r}, channel={self.channel!r})")
+
 
 # How close notes have to be (in seconds) to count as "same time" chord.
 CHORD_WINDOW_SECONDS = 0.02   # 20 ms
@@ -106,84 +33,147 @@ CHORD_WINDOW_SECONDS = 0.02   # 20 ms
 CHORD_ROLL_STEP_SECONDS = 0.005  # 5 ms
 
 
-def roll_chords_in_macro(macro):
+def roll_chord_times(times):
     """
-    For any group of macro events occurring within CHORD_WINDOW_SECONDS from
-    the first note in that group, stagger their times by CHORD_ROLL_STEP_SECONDS
-    so a monophonic instrument can play them sequentially.
+    For any group of times within CHORD_WINDOW_SECONDS of the first time in
+    that group, stagger them by CHORD_ROLL_STEP_SECONDS so a monophonic
+    instrument can play them sequentially.
 
-    Mutates the macro list in-place and assumes it's already sorted by 'time'.
+    Works on a plain list of floats (seconds), mutated in-place, and assumes
+    it's already sorted.
     """
+    window = CHORD_WINDOW_SECONDS
+    step = CHORD_ROLL_STEP_SECONDS
+
     i = 0
-    n = len(macro)
+    n = len(times)
 
     while i < n:
-        start_time = macro[i]["time"]
+        start_time = times[i]
         j = i + 1
 
-        # Find all events that occur within CHORD_WINDOW_SECONDS of the first.
-        while j < n and (macro[j]["time"] - start_time) <= CHORD_WINDOW_SECONDS:
+        # Find all times within the chord window of the first.
+        while j < n and (times[j] - start_time) <= window:
             j += 1
 
-        # [i, j) is the chord group (could be size 1).
-        group_size = j - i
-        if group_size > 1:
-            # Stagger each note in the group.
-            for k in range(i, j):
-                offset = (k - i) * CHORD_ROLL_STEP_SECONDS
-                macro[k]["time"] = start_time + offset
+        # [i, j) is the chord group (could be size 1); the first note
+        # keeps its time, the rest are staggered after it.
+        for k in range(i + 1, j):
+            times[k] = start_time + (k - i) * step
 
         i = j
 
 
+def roll_chords_in_macro(macro):
+    """
+    For any group of macro events occurring within CHORD_WINDOW_SECONDS from
+    the first note in that group, stagger their times by CHORD_ROLL_STEP_SECONDS
+    so a monophonic instrument can play them sequentially.
+
+    Mutates the macro events in-place and assumes they're already sorted by
+    time.
+    """
+    times = [ev.time for ev in macro]
+    roll_chord_times(times)
+
+    for ev, t in zip(macro, times):
+        ev.time = t
+
+
 def csv_to_keystroke_macro(csv_path: str):
     """
     Convert a processed midicsv file into a list of keystroke macro events.
 
-    Each macro event is:
-        {"time": seconds_from_start, "key": "shift+q", "pitch": 72, "channel": 0}
+    Each macro event is a MacroEvent, e.g.:
+        MacroEvent(time=seconds_from_start, key="shift+q", pitch=72, channel=0)
     """
     events = load_midicsv(csv_path)
-    division, tempo_map = extract_tempo_map(events)
+    division, tempo_map = tempo_map_for_path(csv_path, events)
+    return events_to_keystroke_macro(events, division, tempo_map)
+
+
+def events_to_keystroke_macro(events, division=None, tempo_map=None):
+    """
+    Same as csv_to_keystroke_macro, for a column table already in memory.
+    The tempo map is extracted from `events` unless it is passed in.
+    """
+    if tempo_map is None:
+        division, tempo_map = extract_tempo_map(events)
+
+    code = events["code"]
+    time = events["time"]
+    channel_col = events["channel"]
+    pitch_col = events["pitch"]
+    velocity_col = events["velocity"]
+
+    # Playable rows: Note_on_c with positive velocity (0-velocity Note_on is
+    # a Note_off in some MIDI styles) whose pitch has a key in the
+    # 3-octave window.
+    rows = [
+        i for i in range(len(code))
+        if code[i] == EV_NOTE_ON
+        and velocity_col[i] > 0
+        and 0 <= pitch_col[i] < 128
+        and KEY_TABLE[pitch_col[i]] is not None
+    ]
+
+    times_ms = ticks_to_ms_many([time[i] for i in rows], tempo_map, division)
+    times = [ms / 1000.0 for ms in times_ms]
+
+    # Sort by time first (stable, so simultaneous notes keep file order).
+    # midicsv lists each track in tick order, so a single-track file is
+    # usually sorted already and the sort can be skipped; otherwise the
+    # tracks form sorted runs that the stable sort merges in near-linear time.
+    if all(a <= b for a, b in zip(times, times[1:])):
+        order = range(len(rows))
+        sorted_times = times
+    else:
+        order = sorted(range(len(rows)), key=times.__getitem__)
+        sorted_times = [times[j] for j in order]
+
+    # Then roll any chords so a monophonic instrument can handle them
+    roll_chord_times(sorted_times)
 
     macro = []
+    for t, j in zip(sorted_times, order):
+        i = rows[j]
+        pitch = pitch_col[i]
+        macro.append(MacroEvent(t, KEY_TABLE[pitch], pitch, channel_col[i]))
 
-    for ev in events:
-        if not ev.get("is_data"):
-            continue
-        if ev["type"] != "Note_on_c":
-            continue
+    return macro
 
-        # Note_on_c: channel, pitch, velocity
-        channel = int(ev["args"][0])
-        pitch   = int(ev["args"][1])
-        vel     = int(ev["args"][2])
 
-        # Ignore 0-velocity Note_on (these are Note_offs in some MIDI styles)
-        if vel <= 0:
-            continue
+# Binary macro layout: header (with the song's BPM, 0 if unknown), then the
+# times as doubles, then the pitches and channels as one byte each. Keys
+# aren't stored; they follow from the pitch through KEY_TABLE, exactly as
+# when the macro was built.
+_PACKED_MAGIC = b"WWMM"
+_PACKED_HEADER = struct.Struct("<4sII")
 
-        key_combo = pitch_to_key(pitch)
-        if key_combo is None:
-            # Outside 3-octave playable range → skip
-            continue
 
-        t_seconds = ticks_to_ms(ev["time"], tempo_map, division) / 1000.0
+def pack_macro(macro, bpm=0) -> bytes:
+    """Serialise a macro to the compact binary layout read by unpack_macro."""
+    times = array("d", [ev.time for ev in macro])
+    pitches = bytes(ev.pitch for ev in macro)
+    channels = bytes(ev.channel for ev in macro)
+    return b"".join((_PACKED_HEADER.pack(_PACKED_MAGIC, len(macro), bpm),
+                     times.tobytes(), pitches, channels))
 
-        macro.append({
-            "time":    t_seconds,
-            "key":     key_combo,
-            "pitch":   pitch,
-            "channel": channel,
-        })
 
-    # Sort by time first
-    macro.sort(key=lambda x: x["time"])
+def unpack_macro(data: bytes):
+    """Rebuild the (macro, bpm) pair written by pack_macro."""
+    magic, n, bpm = _PACKED_HEADER.unpack_from(data)
+    offset = _PACKED_HEADER.size
+    if magic != _PACKED_MAGIC or len(data) != offset + n * 10:
+        raise ValueError("not a packed macro")
 
-    # Then roll any chords so a monophonic instrument can handle them
-    roll_chords_in_macro(macro)
+    times = array("d")
+    times.frombytes(data[offset:offset + n * 8])
+    pitches = data[offset + n * 8:offset + n * 9]
+    channels = data[offset + n * 9:]
 
-    return macro
+    macro = [MacroEvent(t, KEY_TABLE[p], p, c) for t, p, c in zip(times, pitches, channels)]
+    return macro, bpm
 
 
 def write_python_macro_script(macro, script_path: str):
@@ -195,7 +185,7 @@ def write_python_macro_script(macro, script_path: str):
 
     for ev in macro:
         lines.append(
-            f"    {{'time': {ev['time']:.6f}, 'key': {ev['key']!r}}},"
+            f"    {{'time': {ev.time:.6f}, 'key': {ev.key!r}}},"
         )
 
     lines.append("]")
@@ -1,48 +1,72 @@
 # midi_tools/notes.py
-from midi_tools.tempo import tick_diff_to_ms
+from collections import Counter, namedtuple
+
+from midi_tools.io_midicsv import EV_NOTE_ON
+from midi_tools.tempo import ticks_to_ms_many
+
+# One sounding note: its row index in the event table plus its fields.
+Note = namedtuple("Note", "idx track time channel pitch")
+
+def note_on_columns(events):
+    # Sounding Note_on_c rows (velocity > 0) as parallel lists, selected
+    # with one scan of the code column; no per-note dict is built.
+    code = events["code"]
+    velocity = events["velocity"]
+
+    rows = [i for i, c in enumerate(code) if c == EV_NOTE_ON and velocity[i] > 0]
+
+    track = events["track"]
+    time = events["time"]
+    channel = events["channel"]
+    pitch = events["pitch"]
+
+    return {
+        "idx": rows,
+        "track": [track[i] for i in rows],
+        "time": [time[i] for i in rows],
+        "channel": [channel[i] for i in rows],
+        "pitch": [pitch[i] for i in rows],
+    }
+
 
 def collect_note_ons(events):
-    notes = []
-    for idx, ev in enumerate(events):
-        if not ev.get("is_data"):
-            continue
-        if ev["type"] == "Note_on_c":
-            channel = int(ev["args"][0])
-            pitch = int(ev["args"][1])
-            velocity = int(ev["args"][2])
-            if velocity > 0:
-                notes.append({
-                    "idx": idx,
-                    "track": ev["track"],
-                    "time": ev["time"],
-                    "channel": channel,
-                    "pitch": pitch
-                })
-    return notes
+    cols = note_on_columns(events)
+    return list(map(
+        Note, cols["idx"], cols["track"], cols["time"], cols["channel"], cols["pitch"]
+    ))
 
 
 def kmeans_1d_two_clusters(values, iterations=20):
-    if not values:
+    # Delegates to kmeans_1d_two_clusters_counts over a histogram of values.
+    return kmeans_1d_two_clusters_counts(Counter(values), iterations)
+
+
+def kmeans_1d_two_clusters_counts(counts, iterations=20):
+    # Two-cluster 1-D k-means over a {value: count} histogram of integer
+    # values, so each iteration costs one step per distinct value instead
+    # of one per note.
+    if not counts:
         return None, None, None
 
-    min_v = min(values)
-    max_v = max(values)
-    c_low = float(min_v)
-    c_high = float(max_v)
+    items = sorted(counts.items())
+    c_low = float(items[0][0])
+    c_high = float(items[-1][0])
 
     for _ in range(iterations):
-        low_group = []
-        high_group = []
-        for v in values:
+        low_sum = low_n = 0
+        high_sum = high_n = 0
+        for v, n in items:
             if abs(v - c_low) <= abs(v - c_high):
-                low_group.append(v)
+                low_sum += v * n
+                low_n += n
             else:
-                high_group.append(v)
+                high_sum += v * n
+                high_n += n
 
-        if low_group:
-            c_low = sum(low_group) / len(low_group)
-        if high_group:
-            c_high = sum(high_group) / len(high_group)
+        if low_n:
+            c_low = low_sum / low_n
+        if high_n:
+            c_high = high_sum / high_n
 
     if c_low > c_high:
         c_low, c_high = c_high, c_low
@@ -55,20 +79,28 @@ def group_chords(notes, tempo_map, division, window_ms=20.0):
     if not notes:
         return []
 
-    notes_sorted = sorted(notes, key=lambda x: x["time"])
+    # Notes from a single-track file are usually in time order already.
+    if all(a.time <= b.time for a, b in zip(notes, notes[1:])):
+        notes_sorted = notes
+    else:
+        notes_sorted = sorted(notes, key=lambda x: x.time)
     groups = []
 
+    # Convert every note time once against the cumulative tempo table,
+    # instead of re-walking the tempo map for each pair of notes.
+    ms = ticks_to_ms_many([n.time for n in notes_sorted], tempo_map, division)
+
     current_group = [notes_sorted[0]]
-    ref_time = notes_sorted[0]["time"]
+    ref_ms = ms[0]
 
-    for n in notes_sorted[1:]:
-        dt_ms = tick_diff_to_ms(ref_time, n["time"], tempo_map, division)
+    for n, n_ms in zip(notes_sorted[1:], ms[1:]):
+        dt_ms = n_ms - ref_ms
         if dt_ms <= window_ms:
             current_group.append(n)
         else:
             groups.append(current_group)
             current_group = [n]
-            ref_time = n["time"]
+            ref_ms = n_ms
 
     groups.append(current_group)
     return groups
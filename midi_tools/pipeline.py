@@ -1,37 +1,16 @@
 # midi_tools/pipeline.py
-# from .io_midicsv import load_midicsv, write_midicsv
-# from .tempo import extract_tempo_map
-# from .notes import collect_note_ons, kmeans_1d_two_clusters, group_chords
-# from .mapping import apply_hand_mapping
-#
-# def process_file(infile, outfile,
-#                  Lmin=48, Lmax=66,
-#                  Rmin=72, Rmax=83):
-#     events = load_midicsv(infile)
-#     division, tempo_map = extract_tempo_map(events)
-#     notes = collect_note_ons(events)
-#     pitches = [n["pitch"] for n in notes]
-#
-#     if not pitches:
-#         print("No note-on events found.")
-#         write_midicsv(events, outfile)
-#         return
-#
-#     c_low, c_high, threshold = kmeans_1d_two_clusters(pitches)
-#
-#     left_notes = [n for n in notes if n["pitch"] <= threshold]
-#     right_notes = [n for n in notes if n["pitch"] > threshold]
-#     # left_chords = group_chords(left_notes, tempo_map, division)
-#     # right_chords = group_chords(right_notes, tempo_map, division)
-#
-#     print("Applying new side-mapping with deletion rules...")
-#     events = apply_hand_mapping(events, threshold, Lmin, Lmax, Rmin, Rmax)
-#
-#     write_midicsv(events, outfile)
-
-from midi_tools.io_midicsv import load_midicsv, write_midicsv
-from midi_tools.notes import collect_note_ons, kmeans_1d_two_clusters
+import ctypes
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from midi_tools.io_midicsv import (
+    EV_NOTE_OFF, EV_NOTE_ON, load_midicsv, midi_to_events, write_midicsv,
+)
+from midi_tools.notes import kmeans_1d_two_clusters_counts
 from midi_tools.mapping import apply_hand_mapping
+from midi_tools.macro import events_to_keystroke_macro
+from midi_tools.tempo import first_tempo_bpm
 
 
 def process_file(infile, outfile,
@@ -50,29 +29,137 @@ def process_file(infile, outfile,
     piece is always in range of the instrument.
     """
     events = load_midicsv(infile)
+    events = transform_events(events, window_min, window_max)
+    write_midicsv(events, outfile)
+
 
-    notes = collect_note_ons(events)
-    pitches = [n["pitch"] for n in notes]
+def transform_events(events, window_min=48, window_max=83):
+    """
+    Steps 2–4 of process_file on an already-loaded column table, so callers
+    holding events in memory can skip the CSV round trip. Returns the
+    transformed table.
+    """
+    code = events["code"]
+    pitch_col = events["pitch"]
+    velocity_col = events["velocity"]
 
-    if not pitches:
+    # One scan gathers both the note rows apply_hand_mapping transposes and
+    # a histogram of sounding (Note_on_c, velocity > 0) pitches for the
+    # stats below, so the table isn't walked once per step.
+    note_rows = []
+    pitch_counts = {}
+    for i, c in enumerate(code):
+        if c == EV_NOTE_ON or c == EV_NOTE_OFF:
+            note_rows.append(i)
+            if c == EV_NOTE_ON and velocity_col[i] > 0:
+                p = pitch_col[i]
+                pitch_counts[p] = pitch_counts.get(p, 0) + 1
+
+    if not pitch_counts:
         print("No note-on events found.")
-        write_midicsv(events, outfile)
-        return
+        return events
 
-    P_min = min(pitches)
-    P_max = max(pitches)
+    P_min = min(pitch_counts)
+    P_max = max(pitch_counts)
     print(f"Original pitch range: {P_min} – {P_max}")
 
     # We no longer really need the k-means threshold, but we compute it
     # for potential future diagnostics; apply_hand_mapping ignores it.
-    c_low, c_high, threshold = kmeans_1d_two_clusters(pitches)
+    c_low, c_high, threshold = kmeans_1d_two_clusters_counts(pitch_counts)
     print("K-means clusters (unused for transpose, just info):")
     print(f"  low  center = {c_low:.2f}")
     print(f"  high center = {c_high:.2f}")
     print(f"  split threshold = {threshold:.2f}")
 
     print(f"Applying simple global transpose into [{window_min}, {window_max}]...")
-    events = apply_hand_mapping(events, threshold, window_min, window_max)
+    return apply_hand_mapping(events, threshold, window_min, window_max,
+                              note_rows=note_rows)
 
-    write_midicsv(events, outfile)
 
+def process_folder(indir, outdir, window_min=48, window_max=83, workers=None):
+    """
+    Run process_file on every .csv file in `indir`, writing results with the
+    same file names into `outdir`.
+
+    Files are independent, so they are spread over a process pool
+    (`workers` defaults to the CPU count). Returns the list of output paths.
+    """
+    os.makedirs(outdir, exist_ok=True)
+
+    names = sorted(n for n in os.listdir(indir) if n.lower().endswith(".csv"))
+    infiles = [os.path.join(indir, n) for n in names]
+    outfiles = [os.path.join(outdir, n) for n in names]
+
+    if not infiles:
+        return []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # list() waits for every file and re-raises the first failure.
+        list(pool.map(process_file, infiles, outfiles,
+                      [window_min] * len(infiles), [window_max] * len(infiles)))
+
+    return outfiles
+
+
+def build_macro_from_midi(midi_path: str, window_min=48, window_max=83):
+    """
+    MIDI file → transposed keystroke macro, entirely in memory: the midicsv
+    lines are parsed straight into a column table, transposed and turned
+    into a macro without writing or re-reading any intermediate CSV files.
+
+    Lives here rather than in the GUI so it (and build_many_macros' worker
+    processes) can be used without importing Qt.
+    """
+    return build_macro_and_bpm(midi_path, window_min, window_max)[0]
+
+
+def build_macro_and_bpm(midi_path: str, window_min=48, window_max=83):
+    """
+    Same as build_macro_from_midi, also returning the song's BPM (see
+    first_tempo_bpm) from the same parse, as a (macro, bpm) tuple.
+    """
+    events = midi_to_events(midi_path)
+    bpm = first_tempo_bpm(events)
+
+    events = transform_events(
+        events,
+        window_min=window_min,
+        window_max=window_max,
+    )
+
+    macro = events_to_keystroke_macro(events)
+    return macro, bpm
+
+
+def build_many_macros(midi_paths, window_min=48, window_max=83, workers=None):
+    """
+    Build macros for several MIDI files at once, one worker process per
+    file (up to `workers`, default CPU count). Returns macros in the same
+    order as midi_paths.
+    """
+    midi_paths = list(midi_paths)
+    if not midi_paths:
+        return []
+
+    n = len(midi_paths)
+    workers = min(n, workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(build_macro_from_midi, midi_paths,
+                             [window_min] * n, [window_max] * n))
+
+
+def lower_worker_priority():
+    """
+    ProcessPoolExecutor initializer: run the calling worker process below
+    normal priority, so background macro builds give way to the process
+    that is playing keystrokes.
+    """
+    try:
+        if sys.platform == "win32":
+            BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(5)
+    except (AttributeError, OSError):
+        pass
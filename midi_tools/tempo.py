@@ -1,18 +1,28 @@
 # midi_tools/tempo.py
+import os
+from bisect import bisect_left
+
+from midi_tools.io_midicsv import EV_HEADER, EV_TEMPO, event_args, load_midicsv
+
+# Tempo maps already extracted, keyed by (path, mtime_ns, size) so an edited
+# file is never served a stale map. Oldest entries are evicted first.
+_TEMPO_MAP_CACHE = {}
+_TEMPO_MAP_CACHE_SIZE = 32
+
 
 def extract_tempo_map(events):
     division = None
     tempos = []
 
-    for ev in events:
-        if not ev.get("is_data"):
-            continue
+    code = events["code"]
+    time = events["time"]
 
-        if ev["type"] == "Header":
-            division = int(ev["args"][2])
+    for i in range(len(code)):
+        if code[i] == EV_HEADER:
+            division = int(event_args(events, i)[2])
 
-        if ev["type"] == "Tempo":
-            tempos.append((ev["time"], int(ev["args"][0])))
+        elif code[i] == EV_TEMPO:
+            tempos.append((time[i], int(event_args(events, i)[0])))
 
     if division is None:
         raise ValueError("No Header record with division found in file.")
@@ -24,6 +34,59 @@ def extract_tempo_map(events):
     return division, tempos
 
 
+def first_tempo_bpm(events, default=120):
+    """
+    BPM set by the first Tempo event of the first track (where type 1
+    files keep their tempo changes), or `default` if it sets none. A zero
+    or unparsable tempo gives 0 (unknown) rather than an error, so a bad
+    tempo record never stops the macro from being built.
+    """
+    code = events["code"]
+    track = events["track"]
+
+    first_track = None
+    for i in range(len(code)):
+        if track[i] <= 0:
+            continue
+        if first_track is None:
+            first_track = track[i]
+        elif track[i] != first_track:
+            break
+        if code[i] == EV_TEMPO:
+            try:
+                tempo = int(event_args(events, i)[0])
+            except (IndexError, ValueError):
+                return 0
+            return int(60_000_000 / tempo) if tempo > 0 else 0
+    return default
+
+
+def tempo_map_for_path(path, events=None):
+    """
+    Return (division, tempo_map) for a midicsv file, reusing the result
+    from an earlier call on the same unchanged file.
+
+    Pass the already-loaded `events` table to avoid re-reading the file on
+    a cache miss. The returned tempo map is a tuple and must not be mutated.
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    cached = _TEMPO_MAP_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    if events is None:
+        events = load_midicsv(path)
+    division, tempos = extract_tempo_map(events)
+    cached = (division, tuple(tempos))
+
+    if len(_TEMPO_MAP_CACHE) >= _TEMPO_MAP_CACHE_SIZE:
+        del _TEMPO_MAP_CACHE[next(iter(_TEMPO_MAP_CACHE))]
+    _TEMPO_MAP_CACHE[key] = cached
+    return cached
+
+
 def ticks_to_ms(tick, tempo_map, division):
     ms_total = 0.0
     for i, (t0, tempo) in enumerate(tempo_map):
@@ -47,5 +110,54 @@ def ticks_to_ms(tick, tempo_map, division):
     return ms_total
 
 
+def tempo_segments(tempo_map, division):
+    """
+    Precompute the per-segment tables used by ticks_to_ms_many:
+
+      starts[k]   tick where tempo segment k begins
+      tempos[k]   microseconds per quarter note inside segment k
+      cum[k]      time elapsed at starts[k], in units of 1/division µs
+
+    Every entry is an integer: with a single division for the whole file,
+    elapsed time scaled by division is a plain sum of ticks × tempo, so it
+    can be kept exact until the final conversion to milliseconds.
+    """
+    starts = [t0 for t0, _ in tempo_map]
+    tempos = [tempo for _, tempo in tempo_map]
+
+    cum = [0]
+    for k in range(len(tempo_map) - 1):
+        dticks = max(0, starts[k + 1] - starts[k])
+        cum.append(cum[k] + dticks * tempos[k])
+
+    return starts, tempos, cum
+
+
+def ticks_to_ms_many(ticks, tempo_map, division):
+    """
+    Convert many tick values at once.
+
+    Builds the cumulative segment table once and then resolves each tick
+    with a binary search, instead of walking the whole tempo map per call.
+    Tick math stays in integers; each result takes a single float divide.
+    """
+    starts, tempos, cum = tempo_segments(tempo_map, division)
+    first = starts[0]
+    scale = division * 1000
+
+    out = []
+    for tick in ticks:
+        if tick <= first:
+            # Anything at or before the first tempo event is time zero.
+            out.append(0.0)
+            continue
+
+        # Last segment starting strictly before `tick`.
+        k = bisect_left(starts, tick) - 1
+        out.append((cum[k] + (tick - starts[k]) * tempos[k]) / scale)
+
+    return out
+
+
 def tick_diff_to_ms(t1, t2, tempo_map, division):
     return ticks_to_ms(t2, tempo_map, division) - ticks_to_ms(t1, tempo_map, division)
@@ -1,1425 +1,2099 @@
-import ctypes
-import json
-import os
-import platform
-import sys
-import tempfile
-import threading
-import time
-import traceback
-from concurrent.futures import ThreadPoolExecutor
-
-import keyboard  # global key sender
-from PyQt5 import QtCore, QtGui, QtWidgets, QtSvg
-
-# --- Your existing tools ---
-from midi_tools.io_midicsv import midi_to_csv
-from midi_tools.macro import csv_to_keystroke_macro
-from midi_tools.pipeline import process_file
-
-if platform.system() == "Windows":
-    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("aiyes.instrument.player")
-
-# ==========================
-#  CONFIG
-# ==========================
-
-def resource_path(relative_name: str) -> str:
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
-        base_dir = sys._MEIPASS  # type: ignore[attr-defined]
-    elif getattr(sys, "frozen", False):
-        base_dir = os.path.dirname(sys.executable)
-    else:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-
-    return os.path.join(base_dir, relative_name)
-
-def create_play_icon(size: int = 60) -> QtGui.QIcon:
-    """Create a play icon using SVG."""
-    svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 384 512">
-    <path d="M361 215C375.3 223.8 384 239.3 384 256C384 272.7 375.3 288.2 361 296.1L73.03 472.1C58.21 482 39.51 482.4 24.65 473.9C9.694 465.4 0 449.4 0 432V80C0 62.64 9.694 46.63 24.65 38.13C39.51 29.64 58.21 29.99 73.03 39.04L361 215z" fill="black"/>
-    </svg>'''
-    pixmap = QtGui.QPixmap(size, size)
-    pixmap.fill(QtCore.Qt.transparent)
-    renderer = QtSvg.QSvgRenderer(QtCore.QByteArray(svg.encode()))
-    painter = QtGui.QPainter(pixmap)
-    renderer.render(painter)
-    painter.end()
-    return QtGui.QIcon(pixmap)
-
-def create_pause_icon(size: int = 60) -> QtGui.QIcon:
-    """Create a pause icon using SVG."""
-    svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 320 512">
-    <path d="M287.1 447.1c17.67 0 31.1-14.33 31.1-32V96.03c0-17.67-14.33-32-32-32c-17.67 0-31.1 14.33-31.1 32v319.1C255.1 433.6 270.3 447.1 287.1 447.1zM52.51 447.1c17.67 0 31.1-14.33 31.1-32V96.03c0-17.67-14.33-32-32-32C34.84 64.03 20.5 78.35 20.5 96.03v319.1C20.5 433.6 34.84 447.1 52.51 447.1z" fill="black"/>
-    </svg>'''
-    pixmap = QtGui.QPixmap(size, size)
-    pixmap.fill(QtCore.Qt.transparent)
-    renderer = QtSvg.QSvgRenderer(QtCore.QByteArray(svg.encode()))
-    painter = QtGui.QPainter(pixmap)
-    renderer.render(painter)
-    painter.end()
-    return QtGui.QIcon(pixmap)
-
-class NumericTableItem(QtWidgets.QTableWidgetItem):
-    """Custom table item that sorts numerically instead of alphabetically."""
-    def __lt__(self, other):
-        try:
-            return float(self.text()) < float(other.text())
-        except (ValueError, TypeError):
-            return self.text() < other.text()
-
-class LoadingIndicator(QtWidgets.QWidget):
-    """Loading indicator widget with animated text."""
-    def __init__(self):
-        super().__init__()
-        self.setWindowIcon(QtGui.QIcon(resource_path("Player.ico")))
-        layout = QtWidgets.QVBoxLayout(self)
-        layout.setContentsMargins(0, 2, 0, 2)
-        layout.setSpacing(2)
-        layout.setAlignment(QtCore.Qt.AlignCenter)
-        
-        # Loading label
-        self.label = QtWidgets.QLabel("Loading...")
-        self.label.setAlignment(QtCore.Qt.AlignCenter)
-        self.label.setStyleSheet("color: #2ECC71; font-size: 10pt; font-weight: bold;")
-        self.label.setFixedHeight(16)
-        
-        # Loading bar with padding
-        bar_container = QtWidgets.QHBoxLayout()
-        bar_container.setContentsMargins(15, 0, 15, 0)
-        
-        self.progress = QtWidgets.QProgressBar()
-        self.progress.setRange(0, 0)  # Indeterminate progress
-        self.progress.setFixedHeight(3)
-        self.progress.setTextVisible(False)
-        
-        bar_container.addWidget(self.progress)
-        
-        layout.addWidget(self.label)
-        layout.addLayout(bar_container)
-
-STOP_HOTKEY = "F11"
-SLEEP_TIME = 0.5
-
-WINDOW_MIN_PITCH = 48
-WINDOW_MAX_PITCH = 83
-PLAYLIST_GAP_SECONDS = 5.0
-
-# Playlist persistence - save to exe directory (not temporary _MEIPASS)
-def get_playlist_file():
-    if getattr(sys, "frozen", False):
-        # When frozen as exe, save to the exe's directory (not temporary _MEIPASS)
-        base_dir = os.path.dirname(sys.executable)
-    else:
-        # When running as script
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_dir, "playlist.json")
-
-PLAYLIST_FILE = get_playlist_file()
-
-# ==========================
-#  Nord Color Theme with Green/Black
-# ==========================
-
-# Nord palette colors
-NORD_BG = "#1A1A1A"          # main window background - darker black
-NORD_SURFACE = "#2D2D2D"     # panels / controls - dark gray
-NORD_SURFACE_ALT = "#3A3A3A" # hover / subtle contrast
-NORD_BORDER = "#4A4A4A"      # borders - gray
-
-NORD_TEXT = "#ECEFF4"
-NORD_TEXT_MUTED = "#D8DEE9"
-NORD_HEADER = "#E5E9F0"
-
-NORD_ACCENT = "#2ECC71"      # primary accent - green
-NORD_ACCENT_POS = "#27AE60"  # positive action - darker green
-NORD_ERROR = "#BF616A"
-NORD_WARNING = "#EBCB8B"
-
-def enable_windows_dark_titlebar(window: QtWidgets.QWidget):
-    if platform.system() != "Windows":
-        return
-
-    try:
-        hwnd = int(window.winId())
-    except (Exception,):
-        return
-
-    DWMWA_USE_IMMERSIVE_DARK_MODE = 20  # value for newer Windows 10/11
-    DWMWA_USE_IMMERSIVE_DARK_MODE_BEFORE_20H1 = 19  # fallback for older builds
-
-    # Prepare ctypes
-    dwmapi = ctypes.windll.dwmapi
-    attribute = ctypes.c_int(DWMWA_USE_IMMERSIVE_DARK_MODE)
-    use_dark = ctypes.c_int(1)
-
-    # Try attribute 20 first
-    result = dwmapi.DwmSetWindowAttribute(
-        hwnd,
-        attribute,
-        ctypes.byref(use_dark),
-        ctypes.sizeof(use_dark)
-    )
-
-    if result != 0:
-        # Fallback: try attribute 19
-        attribute = ctypes.c_int(DWMWA_USE_IMMERSIVE_DARK_MODE_BEFORE_20H1)
-        dwmapi.DwmSetWindowAttribute(
-            hwnd,
-            attribute,
-            ctypes.byref(use_dark),
-            ctypes.sizeof(use_dark)
-        )
-
-def apply_nord_theme(app: QtWidgets.QApplication):
-    """
-    Apply a dark Nord theme to the whole application using QPalette + stylesheet.
-    """
-    app.setStyle("Fusion")  # Fusion works best with custom palettes
-
-    palette = QtGui.QPalette()
-
-    # Base colors
-    palette.setColor(QtGui.QPalette.Window, QtGui.QColor(NORD_BG))
-    palette.setColor(QtGui.QPalette.WindowText, QtGui.QColor(NORD_TEXT))
-    palette.setColor(QtGui.QPalette.Base, QtGui.QColor(NORD_SURFACE))
-    palette.setColor(QtGui.QPalette.AlternateBase, QtGui.QColor(NORD_SURFACE_ALT))
-    palette.setColor(QtGui.QPalette.Text, QtGui.QColor(NORD_TEXT))
-    palette.setColor(QtGui.QPalette.Button, QtGui.QColor(NORD_SURFACE))
-    palette.setColor(QtGui.QPalette.ButtonText, QtGui.QColor(NORD_TEXT))
-    palette.setColor(QtGui.QPalette.ToolTipBase, QtGui.QColor(NORD_SURFACE))
-    palette.setColor(QtGui.QPalette.ToolTipText, QtGui.QColor(NORD_TEXT))
-    palette.setColor(QtGui.QPalette.Highlight, QtGui.QColor(NORD_ACCENT))
-    palette.setColor(QtGui.QPalette.HighlightedText, QtGui.QColor(NORD_BG))
-    palette.setColor(QtGui.QPalette.Link, QtGui.QColor(NORD_ACCENT))
-
-    # Disabled state
-    disabled_text = QtGui.QColor(NORD_TEXT_MUTED)
-    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.Text, disabled_text)
-    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.ButtonText, disabled_text)
-
-    app.setPalette(palette)
-
-    # Global stylesheet for finer control
-    app.setStyleSheet(f"""
-        QWidget {{
-            background-color: {NORD_BG};
-            color: {NORD_TEXT};
-            font-size: 10pt;
-        }}
-
-        /* Playlist list */
-        QListWidget {{
-            background-color: {NORD_SURFACE};
-            border: 1px solid {NORD_BORDER};
-            border-radius: 4px;
-        }}
-        QListWidget::item {{
-            padding: 4px 8px;
-        }}
-        QListWidget::item:selected {{
-            background-color: {NORD_ACCENT};
-            color: {NORD_BG};
-        }}
-        QListWidget::item:hover {{
-            background-color: {NORD_SURFACE_ALT};
-        }}
-
-        /* Buttons */
-        QPushButton {{
-            background-color: {NORD_SURFACE};
-            border: 1px solid {NORD_BORDER};
-            border-radius: 4px;
-            padding: 6px 12px;
-            color: {NORD_TEXT};
-            font-weight: bold;
-        }}
-        QPushButton:hover:!disabled {{
-            background-color: {NORD_SURFACE_ALT};
-            border: 1px solid {NORD_ACCENT};
-        }}
-        QPushButton:pressed {{
-            background-color: {NORD_ACCENT_POS};
-            color: white;
-        }}
-        QPushButton:disabled {{
-            color: {NORD_TEXT_MUTED};
-            border-color: {NORD_SURFACE};
-        }}
-        
-        /* Music player buttons special styling */
-        #playButton, #stopButton {{
-            background-color: {NORD_ACCENT};
-            color: black;
-            border: 2px solid {NORD_ACCENT_POS};
-            font-size: 24pt;
-            font-weight: bold;
-            padding: 0px;
-            margin: 0px;
-            min-width: 45px;
-            min-height: 45px;
-            max-width: 45px;
-            max-height: 45px;
-            border-radius: 22px;
-        }}
-        #playButton:hover, #stopButton:hover {{
-            background-color: {NORD_ACCENT_POS};
-            color: white;
-            border: 2px solid white;
-            box-shadow: 0 0 10px rgba(46, 204, 113, 0.5);
-        }}
-        #playButton:pressed, #stopButton:pressed {{
-            background-color: {NORD_ACCENT_POS};
-            color: white;
-            border: 2px solid white;
-        }}
-        #playButton:disabled {{
-            background-color: {NORD_ACCENT};
-            color: black;
-            border: 2px solid {NORD_ACCENT_POS};
-            opacity: 0.5;
-        }}
-        #prevButton, #nextButton, #playPlaylistButton {{
-            background-color: transparent;
-            color: {NORD_ACCENT};
-            border: none;
-            font-size: 12pt;
-            font-weight: bold;
-            padding: 0px;
-            margin: 0px;
-            min-width: 40px;
-            min-height: 40px;
-            max-width: 40px;
-            max-height: 40px;
-            border-radius: 20px;
-        }}
-        #prevButton:hover, #nextButton:hover {{
-            color: {NORD_ACCENT_POS};
-            font-size: 16pt;
-        }}
-        #prevButton:pressed, #nextButton:pressed, #playPlaylistButton:pressed {{
-            background-color: transparent;
-            color: {NORD_ACCENT_POS};
-            font-size: 16pt;
-        }}
-        #prevButton:disabled, #nextButton:disabled {{
-            color: {NORD_ACCENT};
-            opacity: 0.5;
-        }}
-        #playPlaylistButton:hover {{
-            background-color: {NORD_ACCENT_POS};
-            color: white;
-            border: 2px solid white;
-        }}
-        
-        /* Progress bar styling */
-        QProgressBar {{
-            border: 1px solid {NORD_BORDER};
-            border-radius: 3px;
-            background-color: {NORD_SURFACE};
-        }}
-        QProgressBar::chunk {{
-            background-color: {NORD_ACCENT};
-            border-radius: 2px;
-        }}
-
-        /* Menu bar */
-        QMenuBar {{
-            background-color: {NORD_BG};
-            border-bottom: 1px solid {NORD_BORDER};
-        }}
-        QMenuBar::item {{
-            padding: 3px 8px;
-            background: transparent;
-        }}
-        QMenuBar::item:selected {{
-            background: {NORD_SURFACE};
-        }}
-
-        /* Menus */
-        QMenu {{
-            background-color: {NORD_SURFACE};
-            border: 1px solid {NORD_BORDER};
-        }}
-        QMenu::item {{
-            padding: 4px 18px 4px 24px;
-        }}
-        QMenu::item:selected {{
-            background-color: {NORD_ACCENT};
-            color: {NORD_BG};
-        }}
-
-        /* Section header label (Playlist) */
-        QLabel#sectionLabel {{
-            font-weight: bold;
-            color: {NORD_HEADER};
-        }}
-
-        /* Status label styling */
-        QLabel#statusLabel {{
-            color: {NORD_TEXT_MUTED};
-            font-style: italic;
-        }}
-    """)
-
-# ==========================
-#  Macro Builder
-# ==========================
-
-def extract_bpm_from_midi(midi_path: str) -> int:
-    """Extract BPM (tempo) from MIDI file."""
-    try:
-        try:
-            import mido
-        except ImportError:
-            print(f"[BPM] mido not installed, skipping BPM extraction for {midi_path}")
-            return 0
-        
-        mid = mido.MidiFile(midi_path)
-        for msg in mid.tracks[0]:
-            if msg.type == 'set_tempo':
-                # Convert microseconds per beat to BPM
-                bpm = int(60_000_000 / msg.tempo)
-                print(f"[BPM] Extracted BPM {bpm} from {midi_path}")
-                return bpm
-        # Default to 120 if no tempo found
-        print(f"[BPM] No tempo found in {midi_path}, using default 120")
-        return 120
-    except Exception as e:
-        print(f"[BPM] Error extracting BPM from {midi_path}: {e}")
-        return 0  # Return 0 if unable to extract
-
-
-def build_macro_from_midi(midi_path: str):
-    tmp_dir = tempfile.mkdtemp(prefix="winds_gui_")
-
-    base = os.path.splitext(os.path.basename(midi_path))[0]
-    raw_csv = os.path.join(tmp_dir, base + "_raw.csv")
-    transposed_csv = os.path.join(tmp_dir, base + "_transposed.csv")
-
-    midi_to_csv(midi_path, raw_csv)
-
-    process_file(
-        raw_csv,
-        transposed_csv,
-        window_min=WINDOW_MIN_PITCH,
-        window_max=WINDOW_MAX_PITCH,
-    )
-
-    macro = csv_to_keystroke_macro(transposed_csv)
-    return macro
-
-
-# ==========================
-#  Macro Playback
-# ==========================
-
-def play_macro(macro, stop_event: threading.Event, progress_callback=None):
-    if not macro:
-        print("Macro is empty.")
-        return
-
-    print(f"[DEBUG] play_macro called with {len(macro)} events, total duration: {macro[-1]['time']}")
-    # Calculate total duration from the last event
-    total_duration = macro[-1]["time"] if macro else 0
-    
-    start = time.time()
-    for i, event in enumerate(macro):
-        if stop_event.is_set():
-            print(f"[DEBUG] Stopped at event {i}")
-            break
-
-        delay = event["time"] - (time.time() - start)
-        if delay > 0:
-            if stop_event.wait(delay):
-                print(f"[DEBUG] Stopped while waiting at event {i}")
-                break
-
-        if stop_event.is_set():
-            break
-
-        print(f"[DEBUG] Sending key: {event['key']} at time {event['time']}")
-        keyboard.send(event["key"])
-        
-        # Update progress bar with elapsed time and total duration
-        if progress_callback:
-            elapsed = time.time() - start
-            progress = int((i + 1) / len(macro) * 1000)  # Range 0-1000
-            progress_callback(progress, elapsed, total_duration)
-
-
-# ==========================
-#  Main Window
-# ==========================
-
-class MainWindow(QtWidgets.QWidget):
-    # Signal for progress updates (can be emitted from worker threads)
-    progress_updated = QtCore.pyqtSignal(int, float, float)  # progress, elapsed, total_duration
-    duration_loaded = QtCore.pyqtSignal(str, float)  # path, duration - for updating playlist as macros load
-    bpm_loaded = QtCore.pyqtSignal(str, int)  # path, bpm - for updating BPM column
-    
-    def __init__(self):
-        super().__init__()
-
-        self.setWindowTitle("Aiye's Instrument Player - Where Winds Meet")
-        self.setMinimumSize(600, 370)
-
-        # State
-        self.current_midi_path = None
-        self.current_macro = None
-        self.macro_cache = {}
-        self.play_thread = None
-        self.stop_event = threading.Event()
-        self.playlist_mode = False
-        self.is_paused = False  # Track pause state
-        self.current_song_duration = 0  # Store current song duration
-        self.macro_loader_pool = ThreadPoolExecutor(max_workers=3)  # Load up to 3 macros in parallel
-        self.macros_loading = 0  # Track number of macros currently loading
-        self.macros_loading_lock = threading.Lock()  # Thread-safe counter
-        
-        # Connect progress signal to progress bar
-        self.progress_updated.connect(self._on_progress_updated)
-        # Connect duration loading signal
-        self.duration_loaded.connect(self._on_duration_loaded)
-        # Connect BPM loading signal
-        self.bpm_loaded.connect(self._on_bpm_loaded)
-
-        # === LAYOUT ROOT ===
-        layout = QtWidgets.QVBoxLayout(self)
-        layout.setContentsMargins(12, 8, 12, 10)
-        layout.setSpacing(8)
-
-        # === MENUBAR ===
-        menubar = QtWidgets.QMenuBar()
-        layout.setMenuBar(menubar)
-
-        # File menu (Save/Load playlist)
-        file_menu = menubar.addMenu("File")
-
-        act_save = QtWidgets.QAction("Save Playlist…", self)
-        act_save.triggered.connect(self.save_playlist)
-        file_menu.addAction(act_save)
-
-        act_load = QtWidgets.QAction("Load Playlist…", self)
-        act_load.triggered.connect(self.load_playlist)
-        file_menu.addAction(act_load)
-
-        # Help menu (Instructions)
-        help_menu = menubar.addMenu("Help")
-        act_instructions = QtWidgets.QAction("Instructions", self)
-        act_instructions.triggered.connect(self.show_instructions)
-        help_menu.addAction(act_instructions)
-
-        # === PLAYLIST ===
-        playlist_label = QtWidgets.QLabel("Playlist")
-        playlist_label.setObjectName("sectionLabel")
-
-        self.playlist = QtWidgets.QTableWidget()
-        self.playlist.setColumnCount(3)
-        self.playlist.setHorizontalHeaderLabels(["Song Name", "Duration", "BPM"])
-        self.playlist.horizontalHeader().setStretchLastSection(False)
-        # Make column 0 (Song Name) stretchable and wider
-        self.playlist.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
-        # Make columns 1 and 2 resizable
-        self.playlist.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Interactive)
-        self.playlist.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Interactive)
-        # Set minimum widths for Duration and BPM columns
-        self.playlist.setColumnWidth(1, 80)
-        self.playlist.setColumnWidth(2, 60)
-        self.playlist.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        self.playlist.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
-        # Enable sorting by clicking column headers
-        self.playlist.horizontalHeader().setSectionsClickable(True)
-        self.playlist.setSortingEnabled(True)
-        
-        self.playlist.selectionModel().selectionChanged.connect(self.on_playlist_selection_changed)
-        self.playlist.cellDoubleClicked.connect(self.on_playlist_item_double_clicked)
-
-        # Allow drag-drop for quick loading
-        self.playlist.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
-        self.playlist.setDefaultDropAction(QtCore.Qt.MoveAction)
-        self.playlist.setAcceptDrops(True)
-
-        # Right-click context menu
-        self.playlist.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.playlist.customContextMenuRequested.connect(self.show_playlist_context_menu)
-
-        # === STATUS AREA ===
-        self.file_label = QtWidgets.QLabel("No MIDI loaded.")
-        self.file_label.setWordWrap(True)
-
-        # self.status_label = QtWidgets.QLabel("Ready.")
-        # self.status_label.setStyleSheet("color: #555;")
-        self.status_label = QtWidgets.QLabel("Ready.")
-        self.status_label.setObjectName("statusLabel")
-
-        self.progress = QtWidgets.QProgressBar()
-        self.progress.setRange(0, 1000)   # smoother than 0–100
-        self.progress.setValue(0)
-        self.progress.setTextVisible(False)
-        self.progress.setFixedHeight(6)
-
-        # Time labels for music player style
-        self.time_label = QtWidgets.QLabel("0:00")
-        self.time_label.setFixedWidth(50)
-        self.time_label.setAlignment(QtCore.Qt.AlignRight)
-        
-        self.duration_label = QtWidgets.QLabel("0:00")
-        self.duration_label.setFixedWidth(50)
-        self.duration_label.setAlignment(QtCore.Qt.AlignLeft)
-        
-        # Progress bar layout (time - bar - duration)
-        progress_layout = QtWidgets.QHBoxLayout()
-        progress_layout.setContentsMargins(0, 0, 0, 0)
-        progress_layout.setSpacing(8)
-        progress_layout.addWidget(self.time_label)
-        progress_layout.addWidget(self.progress)
-        progress_layout.addWidget(self.duration_label)
-
-        # === BUTTONS ===
-        # Open button at top
-        self.open_button = QtWidgets.QPushButton("📁 Open MIDI")
-        self.open_button.setFixedWidth(130)
-        self.open_button.clicked.connect(self.on_open_clicked)
-        
-        # Save button at top
-        self.save_button = QtWidgets.QPushButton("💾 Save")
-        self.save_button.setFixedWidth(100)
-        self.save_button.clicked.connect(self._save_playlist_to_file)
-
-        # Music player control buttons - icons only
-        self.prev_button = QtWidgets.QPushButton("◄◄")
-        self.prev_button.setObjectName("prevButton")
-        self.prev_button.setEnabled(False)
-        self.prev_button.setFixedSize(40, 40)
-        self.prev_button.clicked.connect(self.on_prev_clicked)
-        
-        self.play_button = QtWidgets.QPushButton()
-        self.play_button.setIcon(create_play_icon(30))
-        self.play_button.setIconSize(QtCore.QSize(24, 24))
-        self.play_button.setObjectName("playButton")
-        self.play_button.setEnabled(False)
-        self.play_button.setFixedSize(45, 45)
-        self.play_button.setFlat(True)
-        self.play_button.clicked.connect(self.on_play_clicked)
-
-        self.next_button = QtWidgets.QPushButton("►►")
-        self.next_button.setObjectName("nextButton")
-        self.next_button.setEnabled(False)
-        self.next_button.setFixedSize(40, 40)
-        self.next_button.clicked.connect(self.on_next_clicked)
-
-        self.play_playlist_button = QtWidgets.QPushButton("Play Playlist")
-        self.play_playlist_button.setObjectName("playPlaylistButton")
-        self.play_playlist_button.setEnabled(False)
-        self.play_playlist_button.clicked.connect(self.on_play_playlist_clicked)
-
-        self.stop_button = QtWidgets.QPushButton("⏹ Stop")
-        self.stop_button.setObjectName("stopButton")
-        self.stop_button.setEnabled(False)
-        self.stop_button.clicked.connect(self.on_stop_clicked)
-
-        # Music player style button row - centered (just play controls)
-        button_row = QtWidgets.QHBoxLayout()
-        button_row.addStretch()
-        button_row.addWidget(self.prev_button)
-        button_row.addWidget(self.play_button)
-        button_row.addWidget(self.next_button)
-        button_row.addStretch()
-        
-        # Center the buttons
-        button_container = QtWidgets.QWidget()
-        button_container.setLayout(button_row)
-        
-        # Create loading indicator
-        self.loading_indicator = LoadingIndicator()
-        
-        # Create stacked widget to switch between loading and buttons
-        self.button_stack = QtWidgets.QStackedWidget()
-        self.button_stack.addWidget(self.loading_indicator)
-        self.button_stack.addWidget(button_container)
-        self.button_stack.setCurrentWidget(self.loading_indicator)
-        # Don't let stacked widget expand vertically
-        self.button_stack.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
-        self.button_stack.setFixedHeight(60)
-
-        # === BUILD LAYOUT ===
-        top_row = QtWidgets.QHBoxLayout()
-        top_row.addWidget(self.open_button)
-        top_row.addWidget(self.save_button)
-        top_row.addStretch()
-        
-        layout.addLayout(top_row)
-        layout.addWidget(self.playlist)
-        layout.addLayout(progress_layout)
-        layout.addWidget(self.button_stack)
-
-        # === GLOBAL PANIC HOTKEY ===
-        keyboard.add_hotkey(STOP_HOTKEY, self._on_global_hotkey)
-        
-        # === LOAD SAVED PLAYLIST ===
-        self.load_playlist_from_file()
-        
-        # === POSITION ON SECOND MONITOR (right split) ===
-        self._position_on_secondary_monitor()
-
-    def _position_on_secondary_monitor(self):
-        """Position window on secondary monitor (right split) at half width if available."""
-        app = QtWidgets.QApplication.instance()
-        if not app:
-            return
-        
-        screens = app.screens()
-        if len(screens) < 2:
-            # No secondary monitor, position on primary at half width
-            primary_screen = screens[0]
-            screen_geometry = primary_screen.geometry()
-            window_width = screen_geometry.width() // 2
-            window_height = int(screen_geometry.height() * 0.85)  # 85% of height for titlebar visibility
-            x = screen_geometry.left()
-            y = screen_geometry.top() + 50  # Add top margin to show toolbar
-            self.setGeometry(x, y, window_width, window_height)
-            self.show()
-            return
-        
-        # Get secondary (right) monitor
-        secondary_screen = screens[1]
-        screen_geometry = secondary_screen.geometry()
-        
-        # Position window at half width on secondary monitor
-        window_width = screen_geometry.width() // 2
-        window_height = int(screen_geometry.height() * 0.85)  # 85% of height for titlebar visibility
-        
-        # Right side of monitor at half width, with top margin to show toolbar
-        x = screen_geometry.right() - window_width
-        y = screen_geometry.top() + 50
-        
-        self.setGeometry(x, y, window_width, window_height)
-        self.show()
-
-    # ==========================
-    #  Instructions Popup
-    # ==========================
-
-    def show_instructions(self):
-        QtWidgets.QMessageBox.information(
-            self,
-            "Instructions",
-            (
-                "Play: plays just the currently loaded song.\n"
-                "Play Playlist: plays all from the selected song through to the end.\n"
-                f"Stop / {STOP_HOTKEY}: interrupts the current song and cancels the rest of the playlist.\n"
-                f"After hitting play, you have {SLEEP_TIME} seconds to switch to your WWM client before keystrokes begin playing.\n"
-                f"{STOP_HOTKEY} stops keystroke play even within WWM.\n"
-                "THIS PROGRAM MUST BE RUN IN ADMINISTRATOR MODE FOR KEYSTROKES TO FUNCTION IN WWM."
-            ),
-        )
-
-    # ==========================
-    #  Playlist Context Menu
-    # ==========================
-
-    def show_playlist_context_menu(self, pos: QtCore.QPoint):
-        item = self.playlist.itemAt(pos)
-        if not item:
-            return
-
-        menu = QtWidgets.QMenu(self)
-        remove_action = menu.addAction("Remove track")
-
-        chosen = menu.exec_(self.playlist.mapToGlobal(pos))
-        if chosen is not remove_action:
-            return
-
-        row = self.playlist.row(item)
-        path_item = self.playlist.item(row, 0)
-        path = path_item.data(QtCore.Qt.UserRole) if path_item else None
-        
-        if not path:
-            return
-
-        # Remove from widget
-        self.playlist.removeRow(row)
-
-        # Drop cached macro
-        if path in self.macro_cache:
-            del self.macro_cache[path]
-
-        # If it was the current track, clear state
-        if self.current_midi_path == path:
-            self.current_midi_path = None
-            self.current_macro = None
-            self.stop_playback()
-            self.play_button.setEnabled(False)
-
-        # Adjust playlist button
-        if self.playlist.rowCount() == 0:
-            self.play_playlist_button.setEnabled(False)
-        else:
-            new_row = min(row, self.playlist.rowCount() - 1)
-            if new_row >= 0:
-                self.playlist.setCurrentCell(new_row, 0)
-
-    # ==========================
-    #  Save / Load Playlist
-    # ==========================
-
-    def save_playlist(self):
-        if self.playlist.rowCount() == 0:
-            QtWidgets.QMessageBox.information(
-                self,
-                "Save Playlist",
-                "There are no tracks in the playlist to save.",
-            )
-            return
-
-        path, _ = QtWidgets.QFileDialog.getSaveFileName(
-            self,
-            "Save Playlist",
-            "",
-            "Playlists (*.json)",
-        )
-        if not path:
-            return
-
-        # Make sure it ends with .json (optional nicety)
-        if not path.lower().endswith(".json"):
-            path += ".json"
-
-        entries = []
-        for i in range(self.playlist.rowCount()):
-            item = self.playlist.item(i, 0)
-            p = item.data(QtCore.Qt.UserRole) if item else None
-            if p:
-                entries.append(p)
-
-        data = {"tracks": entries}
-
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Error Saving Playlist",
-                f"Could not save playlist:\n\n{e}",
-            )
-            return
-
-        self.status_label.setText(f"Playlist saved to: {path}")
-
-    def load_playlist(self):
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self,
-            "Load Playlist",
-            "",
-            "Playlists (*.json)",
-        )
-        if not path:
-            return
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Error Loading Playlist",
-                f"Could not load playlist:\n\n{e}",
-            )
-            return
-
-        tracks = data.get("tracks", [])
-        if not isinstance(tracks, list):
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Error Loading Playlist",
-                "Playlist file format is invalid.",
-            )
-            return
-
-        # Stop current playback & clear existing state
-        self.stop_playback()
-        self.playlist.clear()
-        self.macro_cache.clear()
-        self.current_midi_path = None
-        self.current_macro = None
-        self.play_button.setEnabled(False)
-        self.play_playlist_button.setEnabled(False)
-        self.file_label.setText("")
-        self.status_label.setText("Ready.")
-
-        missing = []
-        first_valid = True
-        for p in tracks:
-            if not isinstance(p, str):
-                continue
-            if not os.path.isfile(p):
-                missing.append(p)
-                continue
-            # Reuse existing helper; this will also select the last added track
-            self.add_to_playlist(p, auto_select=first_valid)
-            first_valid = False
-
-        if missing:
-            QtWidgets.QMessageBox.warning(
-                self,
-                "Missing Files",
-                "Some files in the playlist could not be found:\n\n"
-                + "\n".join(missing),
-            )
-
-    # ==========================
-    #  Playlist Helpers
-    # ==========================
-
-    def add_to_playlist(self, path: str, auto_select: bool = True):
-        path = os.path.abspath(path)
-
-        # Avoid duplicates
-        for i in range(self.playlist.rowCount()):
-            item = self.playlist.item(i, 0)
-            if item and item.data(QtCore.Qt.UserRole) == path:
-                if auto_select:
-                    self.playlist.selectRow(i)
-                return
-
-        # Add row to table immediately (without waiting for macro to load)
-        row_pos = self.playlist.rowCount()
-        self.playlist.insertRow(row_pos)
-        
-        # Column 0: Song name
-        name_item = QtWidgets.QTableWidgetItem(os.path.basename(path))
-        name_item.setToolTip(path)
-        name_item.setData(QtCore.Qt.UserRole, path)
-        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self.playlist.setItem(row_pos, 0, name_item)
-        
-        # Column 1: Duration - show loading initially
-        duration_item = QtWidgets.QTableWidgetItem("Loading...")
-        duration_item.setFlags(duration_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        duration_item.setTextAlignment(QtCore.Qt.AlignCenter)
-        self.playlist.setItem(row_pos, 1, duration_item)
-        
-        # Column 2: BPM (empty for now)
-        bpm_item = NumericTableItem("")
-        bpm_item.setFlags(bpm_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        bpm_item.setTextAlignment(QtCore.Qt.AlignCenter)
-        self.playlist.setItem(row_pos, 2, bpm_item)
-        
-        # Load macro and BPM in background if not already cached
-        if path not in self.macro_cache:
-            self.macro_loader_pool.submit(self._load_macro_background, path)
-        else:
-            # Already cached, update duration immediately
-            macro = self.macro_cache[path]
-            duration = macro[-1]["time"] if macro else 0
-            self.duration_loaded.emit(path, duration)
-
-        if auto_select:
-            self.playlist.selectRow(row_pos)
-
-        if self.playlist.rowCount() > 0:
-            self.play_playlist_button.setEnabled(True)
-            # Update prev/next button states
-            current_row = self.playlist.currentRow()
-            self.prev_button.setEnabled(current_row > 0)
-            self.next_button.setEnabled(current_row < self.playlist.rowCount() - 1)
-    
-    def _load_macro_background(self, path: str):
-        """Load macro in background thread and emit signal when done."""
-        # Mark as loading
-        with self.macros_loading_lock:
-            self.macros_loading += 1
-        self._update_play_button_state()
-        
-        try:
-            if path not in self.macro_cache:
-                macro = build_macro_from_midi(path)
-                self.macro_cache[path] = macro
-                duration = macro[-1]["time"] if macro else 0
-            else:
-                macro = self.macro_cache[path]
-                duration = macro[-1]["time"] if macro else 0
-            
-            # Extract BPM from MIDI
-            bpm = extract_bpm_from_midi(path)
-            
-            self.duration_loaded.emit(path, duration)
-            print(f"[Loader] Emitting BPM signal: path={path}, bpm={bpm}")
-            self.bpm_loaded.emit(path, bpm)
-        except Exception as e:
-            print(f"Error loading macro for {path}: {e}")
-            self.duration_loaded.emit(path, 0)
-            self.bpm_loaded.emit(path, 0)
-        finally:
-            # Mark as done loading
-            with self.macros_loading_lock:
-                self.macros_loading = max(0, self.macros_loading - 1)
-            self._update_play_button_state()
-    
-    @QtCore.pyqtSlot(str, float)
-    def _on_duration_loaded(self, path: str, duration: float):
-        """Update playlist with loaded duration."""
-        for i in range(self.playlist.rowCount()):
-            item = self.playlist.item(i, 0)
-            if item and item.data(QtCore.Qt.UserRole) == path:
-                duration_item = self.playlist.item(i, 1)
-                duration_str = self._format_time(duration)
-                duration_item.setText(duration_str)
-                break
-
-    @QtCore.pyqtSlot(str, int)
-    def _on_bpm_loaded(self, path: str, bpm: int):
-        """Update playlist with loaded BPM."""
-        print(f"[BPM Slot] Received BPM signal: path={path}, bpm={bpm}")
-        for i in range(self.playlist.rowCount()):
-            item = self.playlist.item(i, 0)
-            if item and item.data(QtCore.Qt.UserRole) == path:
-                print(f"[BPM Slot] Found matching row {i}")
-                bpm_item = self.playlist.item(i, 2)
-                bpm_str = str(bpm) if bpm > 0 else ""
-                bpm_item.setText(bpm_str)
-                print(f"[BPM Slot] Set BPM cell text to '{bpm_str}'")
-                break
-        else:
-            print(f"[BPM Slot] No matching row found for path: {path}")
-
-    # ==========================
-    #  Progress Update
-    # ==========================
-    
-    def _format_time(self, seconds: float) -> str:
-        """Format seconds to MM:SS format."""
-        mins = int(seconds) // 60
-        secs = int(seconds) % 60
-        return f"{mins}:{secs:02d}"
-    
-    @QtCore.pyqtSlot(int, float, float)
-    def _on_progress_updated(self, progress_value: int, elapsed: float, total_duration: float):
-        """Update progress bar and time labels from worker thread."""
-        self.progress.setValue(progress_value)
-        self.time_label.setText(self._format_time(elapsed))
-        self.duration_label.setText(self._format_time(total_duration))
-
-    def on_open_clicked(self):
-        paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
-            self,
-            "Select MIDI files",
-            "",
-            "MIDI Files (*.mid *.midi)",
-        )
-        if not paths:
-            return
-
-        first = True
-        for p in paths:
-            self.add_to_playlist(p, auto_select=first)
-            first = False
-
-    def on_playlist_selection_changed(self):
-        current_row = self.playlist.currentRow()
-        if current_row >= 0:
-            item = self.playlist.item(current_row, 0)
-            if item:
-                self.load_midi(item.data(QtCore.Qt.UserRole))
-        
-        # Update prev/next button states
-        self.prev_button.setEnabled(current_row > 0)
-        self.next_button.setEnabled(current_row >= 0 and current_row < self.playlist.rowCount() - 1)
-
-    def on_playlist_item_double_clicked(self, row: int, col: int):
-        path_item = self.playlist.item(row, 0)
-        if path_item:
-            self.load_midi(path_item.data(QtCore.Qt.UserRole))
-            self.on_play_clicked()
-
-    # ==========================
-    #  Load + Build Macro
-    # ==========================
-
-    def load_midi(self, path):
-        self.stop_playback()
-
-        self.current_midi_path = path
-        self.file_label.setText("")
-
-        # Cached?
-        if path in self.macro_cache:
-            self.current_macro = self.macro_cache[path]
-            if self.current_macro:
-                self.play_button.setEnabled(True)
-                # Update duration label
-                self.current_song_duration = self.current_macro[-1]["time"] if self.current_macro else 0
-                self.duration_label.setText(self._format_time(self.current_song_duration))
-            self.status_label.setText("Ready.")
-            return
-
-        # Build in background
-        self.status_label.setText("Processing MIDI…")
-        self.play_button.setEnabled(False)
-
-        def worker():
-            try:
-                macro = build_macro_from_midi(path)
-            except Exception as e:
-                traceback.print_exc()
-                QtCore.QMetaObject.invokeMethod(
-                    self,
-                    "_load_failed",
-                    QtCore.Qt.QueuedConnection,
-                    QtCore.Q_ARG(str, str(e)),
-                )
-                return
-
-            QtCore.QMetaObject.invokeMethod(
-                self,
-                "_load_success",
-                QtCore.Qt.QueuedConnection,
-                QtCore.Q_ARG(object, macro),
-            )
-
-        threading.Thread(target=worker, daemon=True).start()
-
-    @QtCore.pyqtSlot(object)
-    def _load_success(self, macro):
-        self.macro_cache[self.current_midi_path] = macro
-        self.current_macro = macro
-        self.play_button.setEnabled(bool(macro))
-        if macro:
-            # Update duration label
-            self.current_song_duration = macro[-1]["time"] if macro else 0
-            self.duration_label.setText(self._format_time(self.current_song_duration))
-            self.status_label.setText("Ready.")
-        else:
-            self.status_label.setText(
-                "This MIDI produced an empty macro (no playable notes in range)."
-            )
-
-    def _update_play_button_state(self):
-        """Update play button enabled state based on loading status."""
-        with self.macros_loading_lock:
-            is_loading = self.macros_loading > 0
-        
-        # Show buttons if not loading anymore
-        if not is_loading:
-            self._show_buttons()
-        
-        # Disable play button if loading, enable if we have a macro and not loading
-        should_enable = bool(self.current_macro) and not is_loading
-        if self.play_button.isEnabled() != should_enable:
-            self.play_button.setEnabled(should_enable)
-
-    @QtCore.pyqtSlot(str)
-    def _load_failed(self, msg):
-        self.status_label.setText("Error loading MIDI.")
-        QtWidgets.QMessageBox.critical(self, "Error", msg)
-
-    # ==========================
-    #  Playlist Navigation
-    # ==========================
-
-    def on_prev_clicked(self):
-        """Move to previous track in playlist."""
-        current_row = self.playlist.currentRow()
-        if current_row > 0:
-            self.playlist.selectRow(current_row - 1)
-
-    def on_next_clicked(self):
-        """Move to next track in playlist."""
-        current_row = self.playlist.currentRow()
-        if current_row < self.playlist.rowCount() - 1:
-            self.playlist.selectRow(current_row + 1)
-
-    # ==========================
-    #  Playback: Single Track
-    # ==========================
-
-    def on_play_clicked(self):
-        if not self.current_macro:
-            return
-        
-        # Check if macros are still loading
-        with self.macros_loading_lock:
-            if self.macros_loading > 0:
-                self.status_label.setText(f"Still loading {self.macros_loading} songs… please wait.")
-                return
-        
-        # Handle pause/resume
-        if self.play_thread and self.play_thread.is_alive():
-            if self.is_paused:
-                # Resume
-                self.is_paused = False
-                self.stop_event.clear()
-                self.play_button.setIcon(create_pause_icon(40))
-                self.status_label.setText(f"Playing… ({STOP_HOTKEY} to stop)")
-            else:
-                # Pause
-                self.is_paused = True
-                self.stop_event.set()
-                self.play_button.setIcon(create_play_icon(40))
-                self.status_label.setText("Paused")
-            return
-
-        # Start playback
-        time.sleep(SLEEP_TIME)
-        self.playlist_mode = False
-        self.is_paused = False
-        self.play_button.setIcon(create_pause_icon(40))
-        self.status_label.setText(f"Playing… ({STOP_HOTKEY} to stop)")
-        self.stop_event.clear()
-        self.progress.setValue(0)
-        self.time_label.setText("0:00")
-        # Set duration label
-        if self.current_macro:
-            total_duration = self.current_macro[-1]["time"] if self.current_macro else 0
-            self.duration_label.setText(self._format_time(total_duration))
-        self.play_button.setEnabled(True)
-        self.play_playlist_button.setEnabled(False)
-
-        def worker():
-            print(f"[DEBUG] Worker started. Current macro has {len(self.current_macro)} events")
-            play_macro(self.current_macro, self.stop_event, self.progress_updated.emit)
-            print("[DEBUG] Worker finished playback")
-            QtCore.QMetaObject.invokeMethod(
-                self, "_playback_done", QtCore.Qt.QueuedConnection
-            )
-
-        self.play_thread = threading.Thread(target=worker, daemon=True)
-        self.play_thread.start()
-
-    # ==========================
-    #  Playback: Playlist
-    # ==========================
-
-    def on_play_playlist_clicked(self):
-        if self.playlist.rowCount() == 0:
-            return
-        if self.play_thread and self.play_thread.is_alive():
-            return
-
-        time.sleep(SLEEP_TIME)
-        self.playlist_mode = True
-        start_row = self.playlist.currentRow()
-        if start_row < 0:
-            start_row = 0
-
-        self.status_label.setText(f"Playing playlist… ({STOP_HOTKEY} to stop)")
-        self.stop_event.clear()
-        self.progress.setValue(0)
-        self.time_label.setText("0:00")
-        self.duration_label.setText("0:00")
-        self.play_button.setEnabled(False)
-        self.play_playlist_button.setEnabled(False)
-
-        def worker():
-            self._playlist_worker(start_row)
-            QtCore.QMetaObject.invokeMethod(
-                self, "_playback_done", QtCore.Qt.QueuedConnection
-            )
-
-        self.play_thread = threading.Thread(target=worker, daemon=True)
-        self.play_thread.start()
-
-    def _playlist_worker(self, start_index):
-        count = self.playlist.rowCount()
-        for i in range(start_index, count):
-            if self.stop_event.is_set():
-                return
-
-            item = self.playlist.item(i, 0)
-            if not item:
-                continue
-            path = item.data(QtCore.Qt.UserRole)
-
-            # Get or build macro
-            if path in self.macro_cache:
-                macro = self.macro_cache[path]
-            else:
-                try:
-                    macro = build_macro_from_midi(path)
-                    self.macro_cache[path] = macro
-                except (Exception,):
-                    continue
-
-            self.current_midi_path = path
-            self.current_macro = macro
-
-            QtCore.QMetaObject.invokeMethod(
-                self,
-                "_set_now_playing",
-                QtCore.Qt.QueuedConnection,
-                QtCore.Q_ARG(int, i),
-                QtCore.Q_ARG(str, path),
-                QtCore.Q_ARG(object, macro),
-            )
-
-            play_macro(macro, self.stop_event, self.progress_updated.emit)
-            if self.stop_event.is_set():
-                return
-
-            if i < count - 1:
-                if self.stop_event.wait(PLAYLIST_GAP_SECONDS):
-                    return
-
-    @QtCore.pyqtSlot(int, str, object)
-    def _set_now_playing(self, row: int, path: str, macro):
-        if 0 <= row < self.playlist.rowCount():
-            # Prevent selectionChanged from firing while we move the row programmatically
-            self.playlist.blockSignals(True)
-            self.playlist.setCurrentCell(row, 0)
-            self.playlist.blockSignals(False)
-
-        self.file_label.setText(f"Playing: {path}")
-        self.status_label.setText(f"Playing playlist… ({STOP_HOTKEY} to stop)")
-        
-        # Set duration for this track
-        self.time_label.setText("0:00")
-        if macro:
-            total_duration = macro[-1]["time"] if macro else 0
-            self.duration_label.setText(self._format_time(total_duration))
-        else:
-            self.duration_label.setText("0:00")
-
-    # ==========================
-    #  Playback Finished
-    # ==========================
-
-    @QtCore.pyqtSlot()
-    @QtCore.pyqtSlot()
-    def _playback_done(self):
-        self.progress.setValue(0)
-        self.time_label.setText("0:00")
-        self.duration_label.setText("0:00")
-        self.is_paused = False
-
-        if self.current_macro:
-            self.play_button.setEnabled(True)
-            self.play_button.setIcon(create_play_icon(40))
-        else:
-            self.play_button.setEnabled(False)
-
-        if self.playlist.rowCount() > 0:
-            self.play_playlist_button.setEnabled(True)
-        else:
-            self.play_playlist_button.setEnabled(False)
-
-        if self.playlist_mode:
-            self.status_label.setText("Playlist finished or stopped.")
-        else:
-            self.status_label.setText("Ready.")
-
-        self.playlist_mode = False
-
-    # ==========================
-    #  Stop / Panic Hotkey
-    # ==========================
-
-    def on_stop_clicked(self):
-        self.stop_playback()
-        self.play_button.setIcon(create_play_icon(40))
-        self.status_label.setText("Stopped.")
-
-    def stop_playback(self):
-        if self.play_thread and self.play_thread.is_alive():
-            self.stop_event.set()
-            self.play_thread.join(timeout=1.0)
-
-        if self.playlist.rowCount() > 0:
-            self.play_playlist_button.setEnabled(True)
-        if self.current_macro:
-            self.play_button.setEnabled(True)
-
-    def _on_global_hotkey(self):
-        QtCore.QMetaObject.invokeMethod(
-            self, "_global_stop", QtCore.Qt.QueuedConnection
-        )
-
-    @QtCore.pyqtSlot()
-    def _global_stop(self):
-        # F11 now plays/pauses instead of stopping
-        # If a macro is loaded, call on_play_clicked to start or toggle pause
-        if self.current_macro:
-            self.on_play_clicked()
-        else:
-            # If no macro loaded, show message
-            self.status_label.setText("No song selected. Click a song in the playlist first.")
-
-    # ==========================
-    #  Close Event
-    # ==========================
-
-    # ==========================
-    #  Playlist Persistence
-    # ==========================
-    
-    def _save_playlist_to_file(self):
-        """Save current playlist to JSON file."""
-        playlist_data = []
-        for i in range(self.playlist.rowCount()):
-            item = self.playlist.item(i, 0)
-            path = item.data(QtCore.Qt.UserRole) if item else None
-            if path:
-                playlist_data.append(path)
-        
-        try:
-            with open(PLAYLIST_FILE, 'w') as f:
-                json.dump(playlist_data, f, indent=2)
-            self.status_label.setText(f"✓ Playlist saved ({len(playlist_data)} songs)")
-            print(f"[Playlist] Saved {len(playlist_data)} songs to {PLAYLIST_FILE}")
-        except Exception as e:
-            print(f"Error saving playlist: {e}")
-            self.status_label.setText(f"✗ Error saving playlist: {e}")
-    
-    def load_playlist_from_file(self):
-        """Load playlist from JSON file."""
-        if not os.path.exists(PLAYLIST_FILE):
-            self._show_buttons()
-            return
-        
-        try:
-            with open(PLAYLIST_FILE, 'r') as f:
-                playlist_data = json.load(f)
-            
-            if not playlist_data:
-                self._show_buttons()
-                return
-            
-            for path in playlist_data:
-                if os.path.exists(path):
-                    self.add_to_playlist(path, auto_select=False)
-        except Exception as e:
-            print(f"Error loading playlist: {e}")
-            self._show_buttons()
-    
-    def _show_buttons(self):
-        """Show the play buttons and hide the loading indicator."""
-        self.button_stack.setCurrentIndex(1)  # Show button_container
-    
-    def closeEvent(self, event):
-        self.stop_playback()
-        event.accept()
-
-def main():
-    app = QtWidgets.QApplication(sys.argv)
-
-    # Apply dark Nord theme before creating any windows
-    apply_nord_theme(app)
-
-    # Use the .ico and resource_path
-    icon_path = resource_path("Player.ico")
-    app.setWindowIcon(QtGui.QIcon(icon_path))
-
-    w = MainWindow()
-
-    # Try to make the native title bar dark on Windows
-    enable_windows_dark_titlebar(w)
-
-    # Explicitly set the window icon too
-    w.setWindowIcon(QtGui.QIcon(icon_path))
-
-    # Window positioning is handled in MainWindow.__init__ via _position_on_secondary_monitor()
-    sys.exit(app.exec_())
-
-if __name__ == "__main__":
-     main()
+import contextlib
+import ctypes
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import keyboard  # global key sender
+from PyQt5 import QtCore, QtGui, QtWidgets, QtSvg
+
+# --- Your existing tools ---
+from midi_tools import pipeline
+from midi_tools.macro import pack_macro, unpack_macro
+
+_IS_WINDOWS = platform.system() == "Windows"
+
+if _IS_WINDOWS:
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("aiyes.instrument.player")
+
+# ==========================
+#  CONFIG
+# ==========================
+
+@functools.lru_cache(maxsize=None)
+def resource_path(relative_name: str) -> str:
+    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+        base_dir = sys._MEIPASS  # type: ignore[attr-defined]
+    elif getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    return os.path.join(base_dir, relative_name)
+
+@functools.lru_cache(maxsize=8)
+def create_play_icon(size: int = 60) -> QtGui.QIcon:
+    """Create a play icon using SVG (rendered once per size)."""
+    svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 384 512">
+    <path d="M361 215C375.3 223.8 384 239.3 384 256C384 272.7 375.3 288.2 361 296.1L73.03 472.1C58.21 482 39.51 482.4 24.65 473.9C9.694 465.4 0 449.4 0 432V80C0 62.64 9.694 46.63 24.65 38.13C39.51 29.64 58.21 29.99 73.03 39.04L361 215z" fill="black"/>
+    </svg>'''
+    pixmap = QtGui.QPixmap(size, size)
+    pixmap.fill(QtCore.Qt.transparent)
+    renderer = QtSvg.QSvgRenderer(QtCore.QByteArray(svg.encode()))
+    painter = QtGui.QPainter(pixmap)
+    renderer.render(painter)
+    painter.end()
+    return QtGui.QIcon(pixmap)
+
+@functools.lru_cache(maxsize=8)
+def create_pause_icon(size: int = 60) -> QtGui.QIcon:
+    """Create a pause icon using SVG (rendered once per size)."""
+    svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 320 512">
+    <path d="M287.1 447.1c17.67 0 31.1-14.33 31.1-32V96.03c0-17.67-14.33-32-32-32c-17.67 0-31.1 14.33-31.1 32v319.1C255.1 433.6 270.3 447.1 287.1 447.1zM52.51 447.1c17.67 0 31.1-14.33 31.1-32V96.03c0-17.67-14.33-32-32-32C34.84 64.03 20.5 78.35 20.5 96.03v319.1C20.5 433.6 34.84 447.1 52.51 447.1z" fill="black"/>
+    </svg>'''
+    pixmap = QtGui.QPixmap(size, size)
+    pixmap.fill(QtCore.Qt.transparent)
+    renderer = QtSvg.QSvgRenderer(QtCore.QByteArray(svg.encode()))
+    painter = QtGui.QPainter(pixmap)
+    renderer.render(painter)
+    painter.end()
+    return QtGui.QIcon(pixmap)
+
+class PlaylistModel(QtCore.QAbstractTableModel):
+    """
+    Playlist rows (path, duration, BPM) kept in plain Python lists.
+
+    The view only asks for the rows it is drawing, so adding, removing and
+    moving songs don't create or touch per-cell widget items.
+    """
+    HEADERS = ("Song Name", "Duration", "BPM")
+    MIME_TYPE = "application/x-aiyes-playlist-rows"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # One [path, duration_seconds, duration_text, bpm] list per row;
+        # duration_seconds is None and duration_text "Loading..." until known.
+        self._rows = []
+        # Paths currently in the playlist, for O(1) duplicate checks.
+        self._path_set = set()
+        # path -> row for row_of; None after inserts, removals or sorting
+        # until the next lookup rebuilds it.
+        self._row_index = {}
+
+    # ---- Qt model interface ----
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return self.HEADERS[section]
+            return section + 1
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, _duration, duration_text, bpm = self._rows[index.row()]
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return os.path.basename(path)
+            if column == 1:
+                return duration_text
+            return str(bpm) if bpm else ""
+        if role == QtCore.Qt.UserRole:
+            return path
+        if role == QtCore.Qt.ToolTipRole and column == 0:
+            return path
+        if role == QtCore.Qt.TextAlignmentRole and column > 0:
+            return QtCore.Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            # Drops land between rows, never onto a row.
+            return QtCore.Qt.ItemIsDropEnabled
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return QtCore.Qt.MoveAction
+
+    def mimeTypes(self):
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes):
+        rows = sorted({index.row() for index in indexes})
+        mime = QtCore.QMimeData()
+        mime.setData(self.MIME_TYPE, json.dumps([self._rows[r] for r in rows]).encode("utf-8"))
+        return mime
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action == QtCore.Qt.IgnoreAction:
+            return True
+        if not data.hasFormat(self.MIME_TYPE):
+            return False
+        if row < 0:
+            row = parent.row() if parent.isValid() else len(self._rows)
+
+        # Insert copies here; the view then removes the dragged originals.
+        moved = json.loads(bytes(data.data(self.MIME_TYPE)).decode("utf-8"))
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(moved) - 1)
+        self._rows[row:row] = moved
+        self._row_index = None
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        if parent.isValid() or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row + count - 1)
+        del self._rows[row:row + count]
+        self._row_index = None
+        self.endRemoveRows()
+        # A drag-move removes the originals after inserting copies, so the
+        # removed paths may still be present elsewhere.
+        self._path_set = {r[0] for r in self._rows}
+        return True
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if not 0 <= column < len(self.HEADERS):
+            return
+
+        if column == 0:
+            key = lambda r: os.path.basename(r[0]).lower()
+        elif column == 1:
+            key = lambda r: (r[1] is None, r[1] or 0.0)
+        else:
+            key = lambda r: (not r[3], r[3] or 0)
+
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        order_idx = sorted(range(len(old_rows)), key=lambda i: key(old_rows[i]),
+                           reverse=(order == QtCore.Qt.DescendingOrder))
+        self._rows = [old_rows[i] for i in order_idx]
+        self._row_index = None
+
+        # Keep selection / current index on the same songs after sorting.
+        new_pos = {old: new for new, old in enumerate(order_idx)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(new_pos[i.row()], i.column()) for i in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # ---- Playlist helpers ----
+
+    def path(self, row):
+        return self._rows[row][0]
+
+    def paths(self):
+        return [r[0] for r in self._rows]
+
+    def __contains__(self, path):
+        return path in self._path_set
+
+    def row_of(self, path):
+        """Row index holding `path`, or -1."""
+        if self._row_index is None:
+            self._row_index = {r[0]: i for i, r in enumerate(self._rows)}
+        return self._row_index.get(path, -1)
+
+    def append(self, path):
+        return self.extend([path])
+
+    def extend(self, paths):
+        """Append rows for `paths` in one insert; returns the first new row."""
+        row = len(self._rows)
+        if not paths:
+            return row
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(paths) - 1)
+        for i, path in enumerate(paths, row):
+            self._rows.append([path, None, "Loading...", 0])
+            self._path_set.add(path)
+            if self._row_index is not None:
+                self._row_index[path] = i
+        self.endInsertRows()
+        return row
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._path_set = set()
+        self._row_index = {}
+        self.endResetModel()
+
+    def set_duration(self, row, seconds, text):
+        self._rows[row][1] = seconds
+        self._rows[row][2] = text
+        index = self.index(row, 1)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole])
+
+    def set_bpm(self, row, bpm):
+        self._rows[row][3] = bpm
+        index = self.index(row, 2)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole])
+
+class LoadingIndicator(QtWidgets.QWidget):
+    """Loading indicator widget with animated text."""
+    def __init__(self):
+        super().__init__()
+        self.setWindowIcon(QtGui.QIcon(resource_path("Player.ico")))
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 2, 0, 2)
+        layout.setSpacing(2)
+        layout.setAlignment(QtCore.Qt.AlignCenter)
+        
+        # Loading label
+        self.label = QtWidgets.QLabel("Loading...")
+        self.label.setAlignment(QtCore.Qt.AlignCenter)
+        self.label.setStyleSheet("color: #2ECC71; font-size: 10pt; font-weight: bold;")
+        self.label.setFixedHeight(16)
+        
+        # Loading bar with padding
+        bar_container = QtWidgets.QHBoxLayout()
+        bar_container.setContentsMargins(15, 0, 15, 0)
+        
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setRange(0, 0)  # Indeterminate progress
+        self.progress.setFixedHeight(3)
+        self.progress.setTextVisible(False)
+        
+        bar_container.addWidget(self.progress)
+        
+        layout.addWidget(self.label)
+        layout.addLayout(bar_container)
+
+STOP_HOTKEY = "F11"
+SLEEP_TIME = 0.5
+
+INSTRUCTIONS_TEXT = (
+    "Play: plays just the currently loaded song.\n"
+    "Play Playlist: plays all from the selected song through to the end.\n"
+    f"Stop / {STOP_HOTKEY}: interrupts the current song and cancels the rest of the playlist.\n"
+    f"After hitting play, you have {SLEEP_TIME} seconds to switch to your WWM client before keystrokes begin playing.\n"
+    f"{STOP_HOTKEY} stops keystroke play even within WWM.\n"
+    "THIS PROGRAM MUST BE RUN IN ADMINISTRATOR MODE FOR KEYSTROKES TO FUNCTION IN WWM."
+)
+
+WINDOW_MIN_PITCH = 48
+WINDOW_MAX_PITCH = 83
+PLAYLIST_GAP_SECONDS = 5.0
+SELECTION_DEBOUNCE_MS = 150
+LABEL_UPDATE_INTERVAL_MS = 100  # status/file labels repaint at most 10×/s
+METADATA_FLUSH_MS = 100  # loaded durations/BPMs reach the playlist in batches
+LOADING_STATE_DELAY_MS = 30  # load start/finish bursts update the controls once
+
+# Macro builder processes: every core but one, which stays free for the
+# GUI and the playback thread. Spawned pools start workers only as builds
+# queue up, and when launched through main.py each one imports just
+# midi_tools, so an idle or fully cached playlist costs little.
+MACRO_BUILD_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# play_macro sleeps until this close to each note, then spins on
+# perf_counter for the rest, since OS sleeps can overshoot by milliseconds.
+SPIN_WAIT_SECONDS = 0.002
+
+# play_macro reports progress at most this often (~30 Hz); dense songs
+# would otherwise queue a GUI update for every note.
+PROGRESS_INTERVAL_SECONDS = 1 / 30
+
+# Print every key play_macro sends. Off by default: a console write per
+# note costs time inside the timing loop and shows up as jitter.
+DEBUG_PLAYBACK_KEYS = False
+
+# Playlist persistence - save to exe directory (not temporary _MEIPASS)
+def get_playlist_file():
+    if getattr(sys, "frozen", False):
+        # When frozen as exe, save to the exe's directory (not temporary _MEIPASS)
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        # When running as script
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "playlist.json")
+
+PLAYLIST_FILE = get_playlist_file()
+
+# Built macros are cached on disk next to the playlist so songs don't have
+# to be re-converted on every start. Bump MACRO_FORMAT_VERSION whenever the
+# macro contents or the packed file layout change, so stale files are ignored.
+MACRO_CACHE_DIR = os.path.join(os.path.dirname(PLAYLIST_FILE), "macro_cache")
+MACRO_FORMAT_VERSION = 3
+
+# Most macro files kept in MACRO_CACHE_DIR; the least recently used ones
+# beyond this are deleted at startup.
+MACRO_DISK_CACHE_MAX = 1000
+
+# Temp files from save_cached_macro younger than this may still be being
+# written by a loader thread, so prune_macro_cache leaves them alone.
+MACRO_CACHE_TMP_MAX_AGE_SECONDS = 3600
+
+# Macros kept in memory at once (per cache); older ones are reloaded from
+# the disk cache when needed again.
+MACRO_CACHE_MAX = 64
+# ...and at most this many macro events in total, so a run of very long
+# songs can't hold more memory than a typical 64.
+MACRO_CACHE_MAX_EVENTS = 2_000_000
+
+# ==========================
+#  Nord Color Theme with Green/Black
+# ==========================
+
+# Nord palette colors
+NORD_BG = "#1A1A1A"          # main window background - darker black
+NORD_SURFACE = "#2D2D2D"     # panels / controls - dark gray
+NORD_SURFACE_ALT = "#3A3A3A" # hover / subtle contrast
+NORD_BORDER = "#4A4A4A"      # borders - gray
+
+NORD_TEXT = "#ECEFF4"
+NORD_TEXT_MUTED = "#D8DEE9"
+NORD_HEADER = "#E5E9F0"
+
+NORD_ACCENT = "#2ECC71"      # primary accent - green
+NORD_ACCENT_POS = "#27AE60"  # positive action - darker green
+NORD_ERROR = "#BF616A"
+NORD_WARNING = "#EBCB8B"
+
+# DwmSetWindowAttribute, resolved and prototyped once rather than looked
+# up on ctypes.windll for every window.
+if _IS_WINDOWS:
+    from ctypes import wintypes
+
+    _DwmSetWindowAttribute = ctypes.windll.dwmapi.DwmSetWindowAttribute
+    _DwmSetWindowAttribute.argtypes = [
+        wintypes.HWND, wintypes.DWORD, wintypes.LPVOID, wintypes.DWORD,
+    ]
+    _DwmSetWindowAttribute.restype = ctypes.HRESULT
+
+
+def enable_windows_dark_titlebar(window: QtWidgets.QWidget):
+    if not _IS_WINDOWS:
+        return
+
+    try:
+        hwnd = int(window.winId())
+    except (Exception,):
+        return
+
+    DWMWA_USE_IMMERSIVE_DARK_MODE = 20  # value for newer Windows 10/11
+    DWMWA_USE_IMMERSIVE_DARK_MODE_BEFORE_20H1 = 19  # fallback for older builds
+
+    use_dark = ctypes.c_int(1)
+
+    # Try attribute 20 first, then 19 on builds that don't know it. With
+    # restype HRESULT, ctypes raises OSError for a failure code.
+    for attribute in (DWMWA_USE_IMMERSIVE_DARK_MODE,
+                      DWMWA_USE_IMMERSIVE_DARK_MODE_BEFORE_20H1):
+        try:
+            _DwmSetWindowAttribute(hwnd, attribute,
+                                   ctypes.byref(use_dark), ctypes.sizeof(use_dark))
+            return
+        except OSError:
+            continue
+
+def minify_qss(qss: str) -> str:
+    """Drop comments and layout whitespace from a Qt style sheet."""
+    qss = re.sub(r"/\*.*?\*/", "", qss, flags=re.S)
+    qss = re.sub(r"\s+", " ", qss)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", qss).strip()
+
+
+# Widget-specific styling, formatted once from the colours above and
+# minified at import. Plain background/text colours come from
+# nord_palette() instead of a catch-all QWidget rule, so Qt doesn't match
+# a selector against every widget.
+NORD_STYLESHEET = minify_qss(f"""
+        /* Buttons */
+        QPushButton {{
+            background-color: {NORD_SURFACE};
+            border: 1px solid {NORD_BORDER};
+            border-radius: 4px;
+            padding: 6px 12px;
+            font-weight: bold;
+        }}
+        QPushButton:hover:!disabled {{
+            background-color: {NORD_SURFACE_ALT};
+            border: 1px solid {NORD_ACCENT};
+        }}
+        QPushButton:pressed {{
+            background-color: {NORD_ACCENT_POS};
+            color: white;
+        }}
+        QPushButton:disabled {{
+            color: {NORD_TEXT_MUTED};
+            border-color: {NORD_SURFACE};
+        }}
+        
+        /* Music player buttons special styling */
+        #playButton, #stopButton {{
+            background-color: {NORD_ACCENT};
+            color: black;
+            border: 2px solid {NORD_ACCENT_POS};
+            font-size: 24pt;
+            font-weight: bold;
+            padding: 0px;
+            margin: 0px;
+            min-width: 45px;
+            min-height: 45px;
+            max-width: 45px;
+            max-height: 45px;
+            border-radius: 22px;
+        }}
+        #playButton:hover, #stopButton:hover {{
+            background-color: {NORD_ACCENT_POS};
+            color: white;
+            border: 2px solid white;
+        }}
+        #playButton:pressed, #stopButton:pressed {{
+            background-color: {NORD_ACCENT_POS};
+            color: white;
+            border: 2px solid white;
+        }}
+        #playButton:disabled {{
+            background-color: {NORD_ACCENT};
+            color: black;
+            border: 2px solid {NORD_ACCENT_POS};
+        }}
+        #prevButton, #nextButton, #playPlaylistButton {{
+            background-color: transparent;
+            color: {NORD_ACCENT};
+            border: none;
+            font-size: 12pt;
+            font-weight: bold;
+            padding: 0px;
+            margin: 0px;
+            min-width: 40px;
+            min-height: 40px;
+            max-width: 40px;
+            max-height: 40px;
+            border-radius: 20px;
+        }}
+        #prevButton:hover, #nextButton:hover {{
+            color: {NORD_ACCENT_POS};
+            font-size: 16pt;
+        }}
+        #prevButton:pressed, #nextButton:pressed, #playPlaylistButton:pressed {{
+            background-color: transparent;
+            color: {NORD_ACCENT_POS};
+            font-size: 16pt;
+        }}
+        #prevButton:disabled, #nextButton:disabled {{
+            color: {NORD_ACCENT};
+        }}
+        #playPlaylistButton:hover {{
+            background-color: {NORD_ACCENT_POS};
+            color: white;
+            border: 2px solid white;
+        }}
+        
+        /* Progress bar styling */
+        QProgressBar {{
+            border: 1px solid {NORD_BORDER};
+            border-radius: 3px;
+            background-color: {NORD_SURFACE};
+        }}
+        QProgressBar::chunk {{
+            background-color: {NORD_ACCENT};
+            border-radius: 2px;
+        }}
+
+        /* Menu bar */
+        QMenuBar {{
+            border-bottom: 1px solid {NORD_BORDER};
+        }}
+        QMenuBar::item {{
+            padding: 3px 8px;
+            background: transparent;
+        }}
+        QMenuBar::item:selected {{
+            background: {NORD_SURFACE};
+        }}
+
+        /* Menus */
+        QMenu {{
+            background-color: {NORD_SURFACE};
+            border: 1px solid {NORD_BORDER};
+        }}
+        QMenu::item {{
+            padding: 4px 18px 4px 24px;
+        }}
+        QMenu::item:selected {{
+            background-color: {NORD_ACCENT};
+            color: {NORD_BG};
+        }}
+
+        /* Section header label (Playlist) */
+        QLabel#sectionLabel {{
+            font-weight: bold;
+            color: {NORD_HEADER};
+        }}
+
+        /* Status label styling */
+        QLabel#statusLabel {{
+            color: {NORD_TEXT_MUTED};
+            font-style: italic;
+        }}
+""")
+
+
+@functools.lru_cache(maxsize=1)
+def nord_palette() -> QtGui.QPalette:
+    """The Nord QPalette, built on first use and reused afterwards."""
+    palette = QtGui.QPalette()
+
+    # One QColor per theme colour, shared by every role that uses it
+    bg = QtGui.QColor(NORD_BG)
+    text = QtGui.QColor(NORD_TEXT)
+    surface = QtGui.QColor(NORD_SURFACE)
+    accent = QtGui.QColor(NORD_ACCENT)
+
+    # Base colors (item views sit on the window background)
+    palette.setColor(QtGui.QPalette.Window, bg)
+    palette.setColor(QtGui.QPalette.WindowText, text)
+    palette.setColor(QtGui.QPalette.Base, bg)
+    palette.setColor(QtGui.QPalette.AlternateBase, QtGui.QColor(NORD_SURFACE_ALT))
+    palette.setColor(QtGui.QPalette.Text, text)
+    palette.setColor(QtGui.QPalette.Button, bg)  # header sections, scroll bars
+    palette.setColor(QtGui.QPalette.ButtonText, text)
+    palette.setColor(QtGui.QPalette.ToolTipBase, surface)
+    palette.setColor(QtGui.QPalette.ToolTipText, text)
+    palette.setColor(QtGui.QPalette.Highlight, accent)
+    palette.setColor(QtGui.QPalette.HighlightedText, bg)
+    palette.setColor(QtGui.QPalette.Link, accent)
+
+    # Disabled state
+    disabled_text = QtGui.QColor(NORD_TEXT_MUTED)
+    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.Text, disabled_text)
+    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.ButtonText, disabled_text)
+    return palette
+
+
+def apply_nord_theme(app: QtWidgets.QApplication):
+    """
+    Apply a dark Nord theme to the whole application using QPalette + stylesheet.
+    """
+    app.setStyle("Fusion")  # Fusion works best with custom palettes
+    app.setPalette(nord_palette())
+
+    font = app.font()
+    font.setPointSize(10)
+    app.setFont(font)
+
+    # Global stylesheet for finer control
+    app.setStyleSheet(NORD_STYLESHEET)
+
+# ==========================
+#  Macro Builder
+# ==========================
+
+def files_exist(paths):
+    """
+    os.path.isfile for each path. Tracks are grouped by folder: a folder
+    holding several of them is listed once with os.scandir instead of
+    stat-ing every file (each stat is a round trip on network drives),
+    and the folders are checked in parallel.
+    """
+    by_dir = {}
+    for i, p in enumerate(paths):
+        by_dir.setdefault(os.path.dirname(p), []).append(i)
+
+    def check_dir(folder, indexes):
+        names = set()
+        if len(indexes) > 1:
+            try:
+                with os.scandir(folder or os.curdir) as entries:
+                    names = {e.name for e in entries if e.is_file()}
+            except OSError:
+                pass
+        # Anything not seen in the listing (unreadable folder, different
+        # letter case on Windows, ...) gets a plain isfile.
+        return [(i, os.path.basename(paths[i]) in names or os.path.isfile(paths[i]))
+                for i in indexes]
+
+    result = [False] * len(paths)
+    if len(by_dir) < 2:
+        groups = [check_dir(folder, idx) for folder, idx in by_dir.items()]
+    else:
+        with ThreadPoolExecutor(max_workers=min(16, len(by_dir))) as ex:
+            groups = list(ex.map(check_dir, by_dir.keys(), by_dir.values()))
+    for group in groups:
+        for i, ok in group:
+            result[i] = ok
+    return result
+
+
+def print_error_traceback():
+    """
+    traceback.print_exc(), skipped when there is nowhere to print it: a
+    windowed (--noconsole) build has no stderr, and formatting the stack
+    would be wasted.
+    """
+    if sys.stderr is not None:
+        traceback.print_exc()
+
+
+def midi_content_digest(midi_path: str) -> str:
+    """
+    Hash of the file's bytes, so copies of a song share one macro. Only
+    read again when the file's mtime or size changes.
+    """
+    st = os.stat(midi_path)
+    return _content_digest(os.path.abspath(midi_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=1024)
+def _content_digest(midi_path: str, mtime_ns: int, size: int) -> str:
+    with open(midi_path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _macro_disk_path(midi_path: str) -> str:
+    st = os.stat(midi_path)
+    key = "|".join(str(part) for part in (
+        os.path.abspath(midi_path), st.st_mtime_ns, st.st_size,
+        WINDOW_MIN_PITCH, WINDOW_MAX_PITCH, MACRO_FORMAT_VERSION,
+    ))
+    name = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(MACRO_CACHE_DIR, name + ".bin")
+
+
+def load_cached_macro(midi_path: str):
+    """Return the (macro, bpm) cached on disk for this exact file, or None."""
+    try:
+        disk_path = _macro_disk_path(midi_path)
+        with open(disk_path, "rb") as f:
+            cached = unpack_macro(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[Cache] Ignoring unreadable macro cache for {midi_path}: {e}")
+        return None
+
+    # The mtime marks when a file was last used, for prune_macro_cache.
+    try:
+        os.utime(disk_path)
+    except OSError:
+        pass
+    return cached
+
+
+def save_cached_macro(midi_path: str, macro, bpm=0):
+    try:
+        os.makedirs(MACRO_CACHE_DIR, exist_ok=True)
+        disk_path = _macro_disk_path(midi_path)
+        # Write to a temp name first so a crash never leaves a torn file.
+        tmp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pack_macro(macro, bpm))
+        os.replace(tmp_path, disk_path)
+    except Exception as e:
+        print(f"[Cache] Could not save macro cache for {midi_path}: {e}")
+
+
+@functools.lru_cache(maxsize=4096)
+def format_whole_seconds(seconds: int) -> str:
+    """M:SS text for a whole number of seconds, built once per value."""
+    mins, secs = divmod(seconds, 60)
+    return f"{mins}:{secs:02d}"
+
+
+def write_json_atomic(path: str, data):
+    """
+    Write `data` as JSON to `path` through a temp file, so a crash or full
+    disk mid-save leaves the previous file intact instead of a torn one.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def prune_macro_cache(max_files=MACRO_DISK_CACHE_MAX):
+    """
+    Delete the least recently used macro files beyond `max_files`, files
+    left by older cache formats, and temp files from an interrupted save.
+    Runs alongside the loaders, so recent temp files are kept: they may
+    belong to a save still in progress.
+    """
+    try:
+        entries = [e for e in os.scandir(MACRO_CACHE_DIR) if e.is_file()]
+    except OSError:
+        return
+
+    tmp_cutoff = time.time() - MACRO_CACHE_TMP_MAX_AGE_SECONDS
+    stale = []
+    cached = []
+    for e in entries:
+        if e.name.endswith(".bin"):
+            cached.append(e)
+        elif not e.name.endswith(".tmp"):
+            stale.append(e)
+        else:
+            try:
+                if e.stat().st_mtime < tmp_cutoff:
+                    stale.append(e)
+            except OSError:
+                pass
+
+    if len(cached) > max_files:
+        cached.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        stale += cached[max_files:]
+
+    for entry in stale:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    if stale:
+        print(f"[Cache] Removed {len(stale)} old macro cache file(s)")
+
+
+class MacroLRU:
+    """
+    Least-recently-used mapping of macros, capped at `maxsize` entries and
+    `max_events` events in total (`count_events(value)` per entry; the
+    newest entry is always kept). Shared between the GUI and worker
+    threads, so every operation holds a lock; use get() rather than an
+    `in` check followed by a lookup.
+    """
+
+    def __init__(self, maxsize=MACRO_CACHE_MAX, max_events=MACRO_CACHE_MAX_EVENTS,
+                 count_events=len):
+        self.maxsize = maxsize
+        self.max_events = max_events
+        self._count_events = count_events
+        self._data = OrderedDict()
+        self._events = 0  # running total over self._data
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None:
+                self._events -= self._count_events(old)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._events += self._count_events(value)
+            while len(self._data) > 1 and (len(self._data) > self.maxsize
+                                           or self._events > self.max_events):
+                _key, evicted = self._data.popitem(last=False)
+                self._events -= self._count_events(evicted)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data.pop(key)
+            self._events -= self._count_events(value)
+            return value
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._events = 0
+
+
+# ==========================
+#  Macro Playback
+# ==========================
+
+def play_macro(macro, stop_event: threading.Event, progress_callback=None):
+    if not macro:
+        print("Macro is empty.")
+        return
+
+    print(f"[DEBUG] play_macro called with {len(macro)} events, total duration: {macro[-1].time}")
+    # Calculate total duration from the last event
+    total_duration = macro[-1].time if macro else 0
+    
+    # Pull the fields out once and turn offsets into absolute deadlines on
+    # the monotonic perf_counter clock (immune to wall-clock adjustments).
+    keys = [event.key for event in macro]
+    times = [event.time for event in macro]
+    n_events = len(macro)
+
+    # Resolve each distinct key combo to scan codes once, as a tuple of
+    # steps each holding the codes to press in order ("shift+q" gives
+    # ((shift, q),)). They are replayed with press/release below rather
+    # than keyboard.send, which re-parses its argument and would collapse
+    # a pre-parsed combo to its first scan code.
+    parsed = {
+        key: tuple(tuple(codes[0] for codes in step) for step in keyboard.parse_hotkey(key))
+        for key in set(keys)
+    }
+    hotkeys = [parsed[key] for key in keys]
+
+    # Ask Windows for 1 ms timer resolution while playing (default ~15 ms).
+    if _IS_WINDOWS:
+        ctypes.windll.winmm.timeBeginPeriod(1)
+
+    try:
+        start = time.perf_counter()
+        deadlines = [start + t for t in times]
+        last_progress = 0.0
+        last_reported = None  # (bar value, whole seconds) last sent
+        last_index = n_events - 1
+
+        # Bound once; Event.is_set is a plain flag read, so checking it just
+        # before each send is the only stop check the loop needs.
+        stopped = stop_event.is_set
+        wait = stop_event.wait
+        now = time.perf_counter
+        press = keyboard.press
+        release = keyboard.release
+
+        for i in range(n_events):
+            deadline = deadlines[i]
+            delay = deadline - now()
+            if delay > SPIN_WAIT_SECONDS:
+                if wait(delay - SPIN_WAIT_SECONDS):
+                    print(f"[DEBUG] Stopped while waiting at event {i}")
+                    break
+
+            # Spin out the last stretch; sleep(0) yields the GIL to the GUI.
+            while now() < deadline:
+                time.sleep(0)
+
+            if stopped():
+                print(f"[DEBUG] Stopped at event {i}")
+                break
+
+            if DEBUG_PLAYBACK_KEYS:
+                print(f"[DEBUG] Sending key: {keys[i]} at time {times[i]}")
+            # Same order as keyboard.send: press each key of a step, then
+            # release them in reverse.
+            for step in hotkeys[i]:
+                for code in step:
+                    press(code)
+                for code in reversed(step):
+                    release(code)
+
+            # Update progress bar with elapsed time and total duration
+            if progress_callback:
+                elapsed = now() - start
+                if elapsed - last_progress >= PROGRESS_INTERVAL_SECONDS or i == last_index:
+                    last_progress = elapsed
+                    progress = int((i + 1) / n_events * 1000)  # Range 0-1000
+                    # Skip reports that would leave the bar and the M:SS
+                    # label exactly as they are.
+                    shown = (progress, int(elapsed))
+                    if shown != last_reported or i == last_index:
+                        last_reported = shown
+                        progress_callback(progress, elapsed, total_duration)
+    finally:
+        if _IS_WINDOWS:
+            ctypes.windll.winmm.timeEndPeriod(1)
+
+
+# ==========================
+#  Main Window
+# ==========================
+
+class MainWindow(QtWidgets.QWidget):
+    # Signal for progress updates (can be emitted from worker threads)
+    progress_updated = QtCore.pyqtSignal(int, float, float)  # progress, elapsed, total_duration
+    metadata_loaded = QtCore.pyqtSignal()  # a (path, duration, bpm) was queued in _pending_metadata
+    macro_loaded = QtCore.pyqtSignal(str, object)  # path, macro - load_midi finished building
+    load_failed = QtCore.pyqtSignal(str)  # error message - load_midi couldn't build the macro
+    now_playing_changed = QtCore.pyqtSignal(int, str, object)  # row, path, macro - playlist advanced
+    playback_finished = QtCore.pyqtSignal(object)  # stop_event of the job that ended
+    global_hotkey_pressed = QtCore.pyqtSignal()  # emitted from the keyboard hook thread
+    loading_changed = QtCore.pyqtSignal()  # background macro loads started/finished
+    saved_playlist_read = QtCore.pyqtSignal(object)  # existing paths from playlist.json
+    
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Aiye's Instrument Player - Where Winds Meet")
+        self.setMinimumSize(600, 370)
+
+        # State
+        self.current_midi_path = None
+        self.current_macro = None
+        self.macro_cache = MacroLRU()
+        # Same macros keyed by file content, so a song added again from
+        # another folder (or renamed) isn't rebuilt.
+        self.macro_cache_by_hash = MacroLRU(count_events=lambda built: len(built[0]))
+        # Stop flag of the most recently queued playback job; each job gets
+        # its own event so stopping one can never leak into the next.
+        self.stop_event = threading.Event()
+        self._playing = False  # A queued/running job hasn't reported done yet
+        self.playlist_mode = False
+        self.is_paused = False  # Track pause state
+        self.current_song_duration = 0  # Store current song duration
+        self.macro_loader_pool = ThreadPoolExecutor(max_workers=MACRO_BUILD_WORKERS)
+        # Queued/running background loads by path, so loads for songs that
+        # leave the playlist can be cancelled before they start.
+        self._load_futures = {}
+        # Macro building is CPU-bound Python, so the loader threads hand the
+        # actual work to worker processes where it can run truly in parallel.
+        # The workers run below normal priority so warming the cache for a
+        # freshly loaded playlist doesn't disturb playback timing.
+        self.macro_build_pool = ProcessPoolExecutor(
+            max_workers=MACRO_BUILD_WORKERS, initializer=pipeline.lower_worker_priority,
+        )
+        # Builds the next playlist song's macro while the current one plays.
+        self.prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        # Trim the on-disk macro cache off the GUI thread while it's idle.
+        self.prefetch_pool.submit(prune_macro_cache)
+        # One long-lived thread plays queued jobs one after another.
+        self._job_queue = queue.Queue()
+        self._playback_thread = threading.Thread(target=self._playback_loop, daemon=True)
+        self._playback_thread.start()
+        self.macros_loading = 0  # Track number of macros currently loading
+        self.macros_loading_lock = threading.Lock()  # Thread-safe counter
+        
+        # Connect progress signal to progress bar. Always queued: it's
+        # emitted from the playback thread and only schedules repaints.
+        self.progress_updated.connect(self._on_progress_updated, QtCore.Qt.QueuedConnection)
+        # Durations/BPMs from the loader threads are queued and applied to
+        # the playlist in one batch per METADATA_FLUSH_MS, not one repaint
+        # per result.
+        self._pending_metadata = queue.SimpleQueue()
+        self._metadata_timer = QtCore.QTimer(self)
+        self._metadata_timer.setSingleShot(True)
+        self._metadata_timer.setInterval(METADATA_FLUSH_MS)
+        self._metadata_timer.timeout.connect(self._flush_metadata)
+        self.metadata_loaded.connect(self._schedule_metadata_flush, QtCore.Qt.QueuedConnection)
+        # Worker-thread notifications, delivered queued on the GUI thread
+        self.macro_loaded.connect(self._load_success, QtCore.Qt.QueuedConnection)
+        self.load_failed.connect(self._load_failed, QtCore.Qt.QueuedConnection)
+        self.now_playing_changed.connect(self._set_now_playing, QtCore.Qt.QueuedConnection)
+        self.playback_finished.connect(self._playback_done, QtCore.Qt.QueuedConnection)
+        self.global_hotkey_pressed.connect(self._global_stop, QtCore.Qt.QueuedConnection)
+        self.saved_playlist_read.connect(self._apply_saved_playlist, QtCore.Qt.QueuedConnection)
+        # Loads start and finish in bursts; the controls follow once per burst.
+        self._loading_state_timer = QtCore.QTimer(self)
+        self._loading_state_timer.setSingleShot(True)
+        self._loading_state_timer.setInterval(LOADING_STATE_DELAY_MS)
+        self._loading_state_timer.timeout.connect(self._update_play_button_state)
+        self.loading_changed.connect(self._schedule_play_button_state, QtCore.Qt.QueuedConnection)
+
+        # === LAYOUT ROOT ===
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(12, 8, 12, 10)
+        layout.setSpacing(8)
+
+        # === MENUBAR ===
+        menubar = QtWidgets.QMenuBar()
+        layout.setMenuBar(menubar)
+
+        # File menu (Save/Load playlist)
+        file_menu = menubar.addMenu("File")
+
+        act_save = QtWidgets.QAction("Save Playlist…", self)
+        act_save.triggered.connect(self.save_playlist)
+        file_menu.addAction(act_save)
+
+        act_load = QtWidgets.QAction("Load Playlist…", self)
+        act_load.triggered.connect(self.load_playlist)
+        file_menu.addAction(act_load)
+
+        # Help menu (Instructions)
+        help_menu = menubar.addMenu("Help")
+        act_instructions = QtWidgets.QAction("Instructions", self)
+        act_instructions.triggered.connect(self.show_instructions)
+        help_menu.addAction(act_instructions)
+
+        # === PLAYLIST ===
+        playlist_label = QtWidgets.QLabel("Playlist")
+        playlist_label.setObjectName("sectionLabel")
+
+        self.playlist_model = PlaylistModel(self)
+        self.playlist = QtWidgets.QTableView()
+        self.playlist.setModel(self.playlist_model)
+        self.playlist.horizontalHeader().setStretchLastSection(False)
+        # Make column 0 (Song Name) stretchable and wider
+        self.playlist.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        # Make columns 1 and 2 resizable
+        self.playlist.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Interactive)
+        self.playlist.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Interactive)
+        # Set minimum widths for Duration and BPM columns
+        self.playlist.setColumnWidth(1, 80)
+        self.playlist.setColumnWidth(2, 60)
+        self.playlist.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.playlist.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        # Enable sorting by clicking column headers (no initial sort, so
+        # songs stay in the order they were added until a header is clicked)
+        self.playlist.horizontalHeader().setSectionsClickable(True)
+        self.playlist.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.playlist.setSortingEnabled(True)
+        
+        self._pending_path = None
+        self._select_timer = QtCore.QTimer(self)
+        self._select_timer.setSingleShot(True)
+        self._select_timer.setInterval(SELECTION_DEBOUNCE_MS)
+        self._select_timer.timeout.connect(self._apply_selection)
+        self.playlist.selectionModel().selectionChanged.connect(self.on_playlist_selection_changed)
+        self.playlist.doubleClicked.connect(self.on_playlist_item_double_clicked)
+
+        # Allow drag-drop for quick loading
+        self.playlist.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
+        self.playlist.setDefaultDropAction(QtCore.Qt.MoveAction)
+        self.playlist.setDragDropOverwriteMode(False)
+        self.playlist.setAcceptDrops(True)
+
+        # Right-click context menu
+        self.playlist.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.playlist.customContextMenuRequested.connect(self.show_playlist_context_menu)
+
+        # === STATUS AREA ===
+        self.file_label = QtWidgets.QLabel("No MIDI loaded.")
+        self.file_label.setWordWrap(True)
+
+        # self.status_label = QtWidgets.QLabel("Ready.")
+        # self.status_label.setStyleSheet("color: #555;")
+        self.status_label = QtWidgets.QLabel("Ready.")
+        self.status_label.setObjectName("statusLabel")
+
+        # Label text changes go through _set_label_text, which applies the
+        # first change at once and coalesces any burst after it.
+        self._pending_label_text = {}
+        self._throttled_labels = set()
+        self._label_timer = QtCore.QTimer(self)
+        self._label_timer.setSingleShot(True)
+        self._label_timer.setInterval(LABEL_UPDATE_INTERVAL_MS)
+        self._label_timer.timeout.connect(self._flush_label_text)
+
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setRange(0, 1000)   # smoother than 0–100
+        self.progress.setValue(0)
+        self.progress.setTextVisible(False)
+        self.progress.setFixedHeight(6)
+
+        # Time labels for music player style
+        self.time_label = QtWidgets.QLabel("0:00")
+        self.time_label.setFixedWidth(50)
+        self.time_label.setAlignment(QtCore.Qt.AlignRight)
+        
+        self.duration_label = QtWidgets.QLabel("0:00")
+        self.duration_label.setFixedWidth(50)
+        self.duration_label.setAlignment(QtCore.Qt.AlignLeft)
+        
+        # Progress bar layout (time - bar - duration)
+        progress_layout = QtWidgets.QHBoxLayout()
+        progress_layout.setContentsMargins(0, 0, 0, 0)
+        progress_layout.setSpacing(8)
+        progress_layout.addWidget(self.time_label)
+        progress_layout.addWidget(self.progress)
+        progress_layout.addWidget(self.duration_label)
+
+        # === BUTTONS ===
+        # Open button at top
+        self.open_button = QtWidgets.QPushButton("📁 Open MIDI")
+        self.open_button.setFixedWidth(130)
+        self.open_button.clicked.connect(self.on_open_clicked)
+        
+        # Save button at top
+        self.save_button = QtWidgets.QPushButton("💾 Save")
+        self.save_button.setFixedWidth(100)
+        self.save_button.clicked.connect(self._save_playlist_to_file)
+
+        # Music player control buttons - icons only
+        self.prev_button = QtWidgets.QPushButton("◄◄")
+        self.prev_button.setObjectName("prevButton")
+        self.prev_button.setEnabled(False)
+        self.prev_button.setFixedSize(40, 40)
+        self.prev_button.clicked.connect(self.on_prev_clicked)
+        
+        self.play_button = QtWidgets.QPushButton()
+        self.play_button.setIcon(create_play_icon(30))
+        self.play_button.setIconSize(QtCore.QSize(24, 24))
+        self.play_button.setObjectName("playButton")
+        self.play_button.setEnabled(False)
+        self.play_button.setFixedSize(45, 45)
+        self.play_button.setFlat(True)
+        self.play_button.clicked.connect(self.on_play_clicked)
+
+        self.next_button = QtWidgets.QPushButton("►►")
+        self.next_button.setObjectName("nextButton")
+        self.next_button.setEnabled(False)
+        self.next_button.setFixedSize(40, 40)
+        self.next_button.clicked.connect(self.on_next_clicked)
+
+        self.play_playlist_button = QtWidgets.QPushButton("Play Playlist")
+        self.play_playlist_button.setObjectName("playPlaylistButton")
+        self.play_playlist_button.setEnabled(False)
+        self.play_playlist_button.clicked.connect(self.on_play_playlist_clicked)
+
+        self.stop_button = QtWidgets.QPushButton("⏹ Stop")
+        self.stop_button.setObjectName("stopButton")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.on_stop_clicked)
+
+        # Music player style button row - centered (just play controls)
+        button_row = QtWidgets.QHBoxLayout()
+        button_row.addStretch()
+        button_row.addWidget(self.prev_button)
+        button_row.addWidget(self.play_button)
+        button_row.addWidget(self.next_button)
+        button_row.addStretch()
+        
+        # Center the buttons
+        button_container = QtWidgets.QWidget()
+        button_container.setLayout(button_row)
+        
+        # Create loading indicator
+        self.loading_indicator = LoadingIndicator()
+        
+        # Create stacked widget to switch between loading and buttons
+        self.button_stack = QtWidgets.QStackedWidget()
+        self.button_stack.addWidget(self.loading_indicator)
+        self.button_stack.addWidget(button_container)
+        self.button_stack.setCurrentWidget(self.loading_indicator)
+        # Don't let stacked widget expand vertically
+        self.button_stack.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        self.button_stack.setFixedHeight(60)
+
+        # === BUILD LAYOUT ===
+        top_row = QtWidgets.QHBoxLayout()
+        top_row.addWidget(self.open_button)
+        top_row.addWidget(self.save_button)
+        top_row.addStretch()
+        
+        layout.addLayout(top_row)
+        layout.addWidget(self.playlist)
+        layout.addLayout(progress_layout)
+        layout.addWidget(self.button_stack)
+
+        # === GLOBAL PANIC HOTKEY ===
+        keyboard.add_hotkey(STOP_HOTKEY, self._on_global_hotkey)
+        
+        # === POSITION ON SECOND MONITOR (right split) ===
+        self._position_on_secondary_monitor()
+
+        # === LOAD SAVED PLAYLIST ===
+        # Once the event loop runs, so the window paints first and a long
+        # saved playlist doesn't hold up its first frame.
+        QtCore.QTimer.singleShot(0, self.load_playlist_from_file)
+
+    def _position_on_secondary_monitor(self):
+        """Position window on secondary monitor (right split) at half width if available."""
+        app = QtWidgets.QApplication.instance()
+        if not app:
+            return
+        
+        screens = app.screens()
+        if len(screens) < 2:
+            # No secondary monitor, position on primary at half width
+            primary_screen = screens[0]
+            screen_geometry = primary_screen.geometry()
+            window_width = screen_geometry.width() // 2
+            window_height = int(screen_geometry.height() * 0.85)  # 85% of height for titlebar visibility
+            x = screen_geometry.left()
+            y = screen_geometry.top() + 50  # Add top margin to show toolbar
+            self.setGeometry(x, y, window_width, window_height)
+            self.show()
+            return
+        
+        # Get secondary (right) monitor
+        secondary_screen = screens[1]
+        screen_geometry = secondary_screen.geometry()
+        
+        # Position window at half width on secondary monitor
+        window_width = screen_geometry.width() // 2
+        window_height = int(screen_geometry.height() * 0.85)  # 85% of height for titlebar visibility
+        
+        # Right side of monitor at half width, with top margin to show toolbar
+        x = screen_geometry.right() - window_width
+        y = screen_geometry.top() + 50
+        
+        self.setGeometry(x, y, window_width, window_height)
+        self.show()
+
+    # ==========================
+    #  Instructions Popup
+    # ==========================
+
+    def show_instructions(self):
+        QtWidgets.QMessageBox.information(self, "Instructions", INSTRUCTIONS_TEXT)
+
+    # ==========================
+    #  Playlist Context Menu
+    # ==========================
+
+    def show_playlist_context_menu(self, pos: QtCore.QPoint):
+        index = self.playlist.indexAt(pos)
+        if not index.isValid():
+            return
+
+        menu = QtWidgets.QMenu(self)
+        remove_action = menu.addAction("Remove track")
+
+        chosen = menu.exec_(self.playlist.mapToGlobal(pos))
+        if chosen is not remove_action:
+            return
+
+        row = index.row()
+        path = self.playlist_model.path(row)
+
+        # Remove from the playlist
+        self.playlist_model.removeRow(row)
+
+        # Drop cached macro, and its load if that hasn't started yet
+        self.macro_cache.pop(path, None)
+        self._cancel_pending_loads([path])
+
+        # If it was the current track, clear state
+        if self.current_midi_path == path:
+            self.current_midi_path = None
+            self.current_macro = None
+            self.stop_playback()
+
+        # Move the selection to the row that took its place
+        new_row = min(row, self.playlist_model.rowCount() - 1)
+        if new_row >= 0:
+            self.playlist.setCurrentIndex(self.playlist_model.index(new_row, 0))
+        self._refresh_controls()
+
+    # ==========================
+    #  Save / Load Playlist
+    # ==========================
+
+    def save_playlist(self):
+        if self.playlist_model.rowCount() == 0:
+            QtWidgets.QMessageBox.information(
+                self,
+                "Save Playlist",
+                "There are no tracks in the playlist to save.",
+            )
+            return
+
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Save Playlist",
+            "",
+            "Playlists (*.json)",
+        )
+        if not path:
+            return
+
+        # Make sure it ends with .json (optional nicety)
+        if not path.lower().endswith(".json"):
+            path += ".json"
+
+        data = {"tracks": self.playlist_model.paths()}
+
+        try:
+            write_json_atomic(path, data)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Error Saving Playlist",
+                f"Could not save playlist:\n\n{e}",
+            )
+            return
+
+        self._set_status(f"Playlist saved to: {path}")
+
+    def load_playlist(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Load Playlist",
+            "",
+            "Playlists (*.json)",
+        )
+        if not path:
+            return
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Error Loading Playlist",
+                f"Could not load playlist:\n\n{e}",
+            )
+            return
+
+        tracks = data.get("tracks", [])
+        if not isinstance(tracks, list):
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Error Loading Playlist",
+                "Playlist file format is invalid.",
+            )
+            return
+
+        # Stop current playback & clear existing state
+        self.stop_playback()
+        self._cancel_pending_loads(list(self._load_futures))
+        self.playlist_model.clear()
+        self.macro_cache.clear()
+        self.macro_cache_by_hash.clear()
+        self.current_midi_path = None
+        self.current_macro = None
+        self._refresh_controls()
+        self._set_file_label("")
+        self._set_status("Ready.")
+
+        tracks = [p for p in tracks if isinstance(p, str)]
+        exists = files_exist(tracks)
+
+        missing = [p for p, ok in zip(tracks, exists) if not ok]
+        # Also selects the first track found
+        self.add_many_to_playlist([p for p, ok in zip(tracks, exists) if ok])
+
+        if missing:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Missing Files",
+                "Some files in the playlist could not be found:\n\n"
+                + "\n".join(missing),
+            )
+
+    # ==========================
+    #  Playlist Helpers
+    # ==========================
+
+    @contextlib.contextmanager
+    def _bulk_playlist_update(self):
+        """
+        Add many songs at once without per-row repaints, sorting or
+        selection callbacks; the selection handler runs once at the end.
+        """
+        selection_model = self.playlist.selectionModel()
+        sorting = self.playlist.isSortingEnabled()
+        row_before = self.playlist.currentIndex().row()
+
+        self.playlist.setUpdatesEnabled(False)
+        self.playlist.setSortingEnabled(False)
+        selection_model.blockSignals(True)
+        try:
+            yield
+        finally:
+            selection_model.blockSignals(False)
+            self.playlist.setSortingEnabled(sorting)
+            self.playlist.setUpdatesEnabled(True)
+
+        if self.playlist.currentIndex().row() != row_before:
+            self.on_playlist_selection_changed()
+
+    def add_to_playlist(self, path: str, auto_select: bool = True):
+        self.add_many_to_playlist([path], select_first=auto_select)
+
+    def add_many_to_playlist(self, paths, select_first: bool = True):
+        """
+        Add songs to the end of the playlist in one model insert, skipping
+        ones already in it. With select_first, the first of `paths` is
+        selected afterwards (even if it was already in the playlist).
+        """
+        # Playlist files and file dialogs give absolute paths already; those
+        # only need normpath's string cleanup (e.g. "/" → "\\" on Windows),
+        # not abspath's filesystem call.
+        paths = [os.path.normpath(p) if os.path.isabs(p) else os.path.abspath(p)
+                 for p in paths]
+        if not paths:
+            return
+
+        # Avoid duplicates, both with the playlist and within `paths`
+        new_paths = []
+        seen = set()
+        for path in paths:
+            if path not in self.playlist_model and path not in seen:
+                seen.add(path)
+                new_paths.append(path)
+
+        with self._bulk_playlist_update():
+            # Add rows immediately (without waiting for macros to load); the
+            # duration shows "Loading..." and the BPM stays empty until known.
+            first_row = self.playlist_model.extend(new_paths)
+
+            # Load macro and BPM in background if not already cached
+            for row, path in enumerate(new_paths, first_row):
+                macro = self.macro_cache.get(path)
+                if macro is None:
+                    future = self.macro_loader_pool.submit(self._load_macro_background, path)
+                    self._load_futures[path] = future
+                    future.add_done_callback(functools.partial(self._forget_load, path))
+                else:
+                    # Already cached, update duration immediately
+                    duration = macro[-1].time if macro else 0
+                    self.playlist_model.set_duration(row, duration, self._format_time(duration))
+
+            if select_first:
+                self.playlist.selectRow(self.playlist_model.row_of(paths[0]))
+
+        self._refresh_controls()
+    
+    def _forget_load(self, path, future):
+        # Done callback; the path may already have a newer load queued.
+        if self._load_futures.get(path) is future:
+            self._load_futures.pop(path, None)
+
+    def _cancel_pending_loads(self, paths):
+        """Cancel queued background loads for `paths`; running ones finish."""
+        for path in paths:
+            future = self._load_futures.pop(path, None)
+            if future is not None:
+                future.cancel()
+
+    def _build_macro_in_worker(self, path: str):
+        """
+        Build a macro on the process pool and wait for it, unless an
+        identical file was already built this session or is cached on disk.
+        Returns (macro, bpm); the BPM comes from the same parse as the macro.
+        Call from a worker thread, never the GUI thread.
+        """
+        digest = midi_content_digest(path)
+        built = self.macro_cache_by_hash.get(digest)
+        if built is not None:
+            return built
+
+        built = load_cached_macro(path)
+        if built is None:
+            # Submit the midi_tools function itself; it pickles by module
+            # path. Started through main.py, the spawned workers then
+            # import only midi_tools, never this Qt module.
+            built = self.macro_build_pool.submit(
+                pipeline.build_macro_and_bpm, path,
+                WINDOW_MIN_PITCH, WINDOW_MAX_PITCH,
+            ).result()
+            save_cached_macro(path, *built)
+        self.macro_cache_by_hash[digest] = built
+        return built
+
+    def _load_macro_background(self, path: str):
+        """Load macro in background thread and emit signal when done."""
+        # Mark as loading
+        with self.macros_loading_lock:
+            self.macros_loading += 1
+        self.loading_changed.emit()
+        
+        try:
+            macro, bpm = self._build_macro_in_worker(path)
+            self.macro_cache[path] = macro
+            duration = macro[-1].time if macro else 0
+            
+            self._pending_metadata.put((path, duration, bpm))
+        except Exception as e:
+            print(f"Error loading macro for {path}: {e}")
+            self._pending_metadata.put((path, 0, 0))
+        finally:
+            self.metadata_loaded.emit()
+            # Mark as done loading
+            with self.macros_loading_lock:
+                self.macros_loading = max(0, self.macros_loading - 1)
+            self.loading_changed.emit()
+    
+    @QtCore.pyqtSlot()
+    def _schedule_metadata_flush(self):
+        if not self._metadata_timer.isActive():
+            self._metadata_timer.start()
+
+    def _flush_metadata(self):
+        """Apply every queued duration/BPM to the playlist in one repaint."""
+        self.playlist.setUpdatesEnabled(False)
+        try:
+            while True:
+                try:
+                    path, duration, bpm = self._pending_metadata.get_nowait()
+                except queue.Empty:
+                    break
+                row = self.playlist_model.row_of(path)
+                if row >= 0:
+                    self.playlist_model.set_duration(row, duration, self._format_time(duration))
+                    self.playlist_model.set_bpm(row, bpm if bpm > 0 else 0)
+        finally:
+            self.playlist.setUpdatesEnabled(True)
+
+    # ==========================
+    #  Progress Update
+    # ==========================
+    
+    def _format_time(self, seconds: float) -> str:
+        """Format seconds to MM:SS format."""
+        return format_whole_seconds(int(seconds))
+    
+    @QtCore.pyqtSlot(int, float, float)
+    def _on_progress_updated(self, progress_value: int, elapsed: float, total_duration: float):
+        """Update progress bar and time labels from worker thread."""
+        self.progress.setValue(progress_value)
+        self.time_label.setText(self._format_time(elapsed))
+        self.duration_label.setText(self._format_time(total_duration))
+
+    def on_open_clicked(self):
+        paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self,
+            "Select MIDI files",
+            "",
+            "MIDI Files (*.mid *.midi)",
+        )
+        if not paths:
+            return
+
+        self.add_many_to_playlist(paths)
+
+    def on_playlist_selection_changed(self):
+        current_row = self.playlist.currentIndex().row()
+        if current_row >= 0:
+            # Load once the selection settles, not for every row that
+            # arrow-key navigation passes over.
+            self._pending_path = self.playlist_model.path(current_row)
+            self._select_timer.start()
+
+        # Update prev/next button states
+        self._refresh_controls()
+
+    def _flush_pending_selection(self):
+        """Load a still-debounced selection now, before acting on it."""
+        if self._select_timer.isActive():
+            self._select_timer.stop()
+            self._apply_selection()
+
+    def _apply_selection(self):
+        if self._pending_path:
+            self.load_midi(self._pending_path)
+            self._pending_path = None
+
+    def on_playlist_item_double_clicked(self, index: QtCore.QModelIndex):
+        if index.isValid():
+            self._select_timer.stop()
+            self._pending_path = None
+            self.load_midi(self.playlist_model.path(index.row()))
+            self.on_play_clicked()
+
+    # ==========================
+    #  Load + Build Macro
+    # ==========================
+
+    def load_midi(self, path):
+        self.stop_playback()
+
+        self.current_midi_path = path
+        self._set_file_label("")
+
+        # Cached?
+        macro = self.macro_cache.get(path)
+        if macro is not None:
+            self.current_macro = macro
+            self._refresh_controls()
+            if self.current_macro:
+                # Update duration label
+                self.current_song_duration = self.current_macro[-1].time if self.current_macro else 0
+                self.duration_label.setText(self._format_time(self.current_song_duration))
+            self._set_status("Ready.")
+            return
+
+        # Build in background; nothing is playable until it's done
+        self.current_macro = None
+        self._refresh_controls()
+        self._set_status("Processing MIDI…")
+
+        def worker():
+            try:
+                macro, _bpm = self._build_macro_in_worker(path)
+            except Exception as e:
+                print_error_traceback()
+                self.load_failed.emit(str(e))
+                return
+
+            self.macro_loaded.emit(path, macro)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @QtCore.pyqtSlot(str, object)
+    def _load_success(self, path, macro):
+        # Cache under the path that was built, not whatever is selected now.
+        self.macro_cache[path] = macro
+        if path != self.current_midi_path:
+            # Another song was selected while this one was building.
+            return
+        self.current_macro = macro
+        self._refresh_controls()
+        if macro:
+            # Update duration label
+            self.current_song_duration = macro[-1].time if macro else 0
+            self.duration_label.setText(self._format_time(self.current_song_duration))
+            self._set_status("Ready.")
+        else:
+            self._set_status(
+                "This MIDI produced an empty macro (no playable notes in range)."
+            )
+
+    def _set_status(self, text: str):
+        self._set_label_text(self.status_label, text)
+
+    def _set_file_label(self, text: str):
+        self._set_label_text(self.file_label, text)
+
+    def _set_label_text(self, label, text: str):
+        if label in self._throttled_labels:
+            # Changed within the last interval: keep only the newest text.
+            self._pending_label_text[label] = text
+        else:
+            self._pending_label_text.pop(label, None)
+            label.setText(text)
+            self._throttled_labels.add(label)
+        if not self._label_timer.isActive():
+            self._label_timer.start()
+
+    def _flush_label_text(self):
+        pending = self._pending_label_text
+        self._pending_label_text = {}
+        for label, text in pending.items():
+            label.setText(text)
+        # Labels just flushed stay throttled for one more interval.
+        self._throttled_labels = set(pending)
+        if pending:
+            self._label_timer.start()
+
+    @QtCore.pyqtSlot()
+    def _schedule_play_button_state(self):
+        if not self._loading_state_timer.isActive():
+            self._loading_state_timer.start()
+
+    def _update_play_button_state(self):
+        """Update play button enabled state based on loading status."""
+        with self.macros_loading_lock:
+            is_loading = self.macros_loading > 0
+        
+        # Show buttons if not loading anymore
+        if not is_loading:
+            self._show_buttons()
+
+        self._refresh_controls()
+
+    def _refresh_controls(self):
+        """
+        Enable/disable the transport buttons from the current state. Only
+        buttons whose state actually changes are touched, since each
+        setEnabled restyles the button.
+        """
+        with self.macros_loading_lock:
+            is_loading = self.macros_loading > 0
+        rows = self.playlist_model.rowCount()
+        current_row = self.playlist.currentIndex().row()
+        playing = self._playback_active()
+
+        wanted = (
+            # Play doubles as pause for a single song, but not in playlist mode
+            (self.play_button, bool(self.current_macro) and not is_loading
+                               and not (playing and self.playlist_mode)),
+            (self.play_playlist_button, rows > 0 and not playing),
+            (self.prev_button, current_row > 0),
+            (self.next_button, 0 <= current_row < rows - 1),
+        )
+        for button, enabled in wanted:
+            if button.isEnabled() != enabled:
+                button.setEnabled(enabled)
+
+    @QtCore.pyqtSlot(str)
+    def _load_failed(self, msg):
+        self._set_status("Error loading MIDI.")
+        QtWidgets.QMessageBox.critical(self, "Error", msg)
+
+    # ==========================
+    #  Playlist Navigation
+    # ==========================
+
+    def on_prev_clicked(self):
+        """Move to previous track in playlist."""
+        current_row = self.playlist.currentIndex().row()
+        if current_row > 0:
+            self.playlist.selectRow(current_row - 1)
+
+    def on_next_clicked(self):
+        """Move to next track in playlist."""
+        current_row = self.playlist.currentIndex().row()
+        if current_row < self.playlist_model.rowCount() - 1:
+            self.playlist.selectRow(current_row + 1)
+
+    # ==========================
+    #  Playback: Single Track
+    # ==========================
+
+    def on_play_clicked(self):
+        self._flush_pending_selection()
+        if not self.current_macro:
+            return
+        
+        # Check if macros are still loading
+        with self.macros_loading_lock:
+            if self.macros_loading > 0:
+                self._set_status(f"Still loading {self.macros_loading} songs… please wait.")
+                return
+        
+        # Handle pause
+        if self._playback_active():
+            self.is_paused = True
+            self.stop_event.set()
+            self.play_button.setIcon(create_play_icon(40))
+            self._set_status("Paused")
+            return
+
+        # Start playback
+        self.playlist_mode = False
+        self.is_paused = False
+        self.play_button.setIcon(create_pause_icon(40))
+        self._set_status(f"Playing… ({STOP_HOTKEY} to stop)")
+        self.progress.setValue(0)
+        self.time_label.setText("0:00")
+        # Set duration label
+        if self.current_macro:
+            total_duration = self.current_macro[-1].time if self.current_macro else 0
+            self.duration_label.setText(self._format_time(total_duration))
+        self._post_job("single", self.current_macro)
+        self._refresh_controls()
+
+    # ==========================
+    #  Playback: Playlist
+    # ==========================
+
+    def on_play_playlist_clicked(self):
+        # The playlist starts from the selected row itself; a load of it
+        # firing later would stop the playback started here.
+        self._select_timer.stop()
+        self._pending_path = None
+        if self.playlist_model.rowCount() == 0:
+            return
+        if self._playback_active():
+            return
+
+        self.playlist_mode = True
+        start_row = self.playlist.currentIndex().row()
+        if start_row < 0:
+            start_row = 0
+
+        self._set_status(f"Playing playlist… ({STOP_HOTKEY} to stop)")
+        self.progress.setValue(0)
+        self.time_label.setText("0:00")
+        self.duration_label.setText("0:00")
+        # Snapshot the paths here on the GUI thread; the worker must not
+        # touch the playlist model from its own thread.
+        paths = self.playlist_model.paths()
+
+        self._post_job("playlist", paths, start_row)
+        self._refresh_controls()
+
+    # ==========================
+    #  Playback Worker Thread
+    # ==========================
+
+    def _playback_active(self):
+        """True while a queued or running job hasn't been stopped or finished."""
+        return self._playing and not self.stop_event.is_set()
+
+    def _post_job(self, kind, *args):
+        """Queue a playback job ("single", macro) or ("playlist", paths, start_row)."""
+        # A job still winding down keeps its own (already set) event, and
+        # the queue runs this one only after it has returned.
+        self.stop_event = threading.Event()
+        self._playing = True
+        self._job_queue.put((kind, self.stop_event, args))
+
+    def _playback_loop(self):
+        while True:
+            job = self._job_queue.get()
+            if job is None:
+                return
+            kind, stop_event, args = job
+            try:
+                self._run_job(kind, stop_event, args)
+            except Exception:
+                print_error_traceback()
+            self.playback_finished.emit(stop_event)
+
+    def _run_job(self, kind, stop_event, args):
+        # Give the user SLEEP_TIME to switch to the game window. Waiting on
+        # the job's event keeps the GUI responsive and lets a stop cut it
+        # short; it also skips jobs stopped before they got to run.
+        if stop_event.wait(SLEEP_TIME):
+            return
+        if kind == "single":
+            (macro,) = args
+            print(f"[DEBUG] Worker started. Current macro has {len(macro)} events")
+            play_macro(macro, stop_event, self.progress_updated.emit)
+            print("[DEBUG] Worker finished playback")
+        elif kind == "playlist":
+            paths, start_row = args
+            self._playlist_worker(start_row, paths, stop_event)
+
+    def _playlist_macro(self, path):
+        """
+        Macro for a playlist song, from memory, from its background load,
+        or built now. A background load still queued behind other songs is
+        taken over rather than waited for; one already running is awaited
+        so the song isn't built twice. Call from a worker thread.
+        """
+        macro = self.macro_cache.get(path)
+        if macro is not None:
+            return macro
+
+        load = self._load_futures.get(path)
+        if load is not None and not load.cancel():
+            load.result()  # _load_macro_background handles its own errors
+            macro = self.macro_cache.get(path)
+            if macro is not None:
+                return macro
+
+        # Built in a worker process so it doesn't compete with the
+        # playback thread's timing loop for the GIL.
+        macro, bpm = self._build_macro_in_worker(path)
+        self.macro_cache[path] = macro
+        if load is not None:
+            # Fill in the playlist row the cancelled load would have.
+            self._pending_metadata.put((path, macro[-1].time if macro else 0, bpm))
+            self.metadata_loaded.emit()
+        return macro
+
+    def _prefetch_macro(self, path):
+        try:
+            self._playlist_macro(path)
+        except Exception as e:
+            print(f"[Prefetch] Could not build macro for {path}: {e}")
+
+    def _playlist_worker(self, start_index, paths, stop_event):
+        count = len(paths)
+        prefetch = None
+        for i in range(start_index, count):
+            if stop_event.is_set():
+                return
+
+            path = paths[i]
+            if not path:
+                continue
+
+            # Get or build macro (waiting on a prefetch of it if one is running)
+            macro = self.macro_cache.get(path)
+            if macro is None and prefetch and prefetch[0] == path:
+                prefetch[1].result()
+                macro = self.macro_cache.get(path)
+            if macro is None:
+                try:
+                    macro = self._playlist_macro(path)
+                except (Exception,):
+                    continue
+
+            # Warm the next song's macro during this one and the gap after it
+            prefetch = None
+            if i + 1 < count:
+                next_path = paths[i + 1]
+                if next_path and next_path not in self.macro_cache:
+                    prefetch = (next_path, self.prefetch_pool.submit(self._prefetch_macro, next_path))
+
+            self.current_midi_path = path
+            self.current_macro = macro
+
+            self.now_playing_changed.emit(i, path, macro)
+
+            play_macro(macro, stop_event, self.progress_updated.emit)
+            if stop_event.is_set():
+                return
+
+            if i < count - 1:
+                if stop_event.wait(PLAYLIST_GAP_SECONDS):
+                    return
+
+    @QtCore.pyqtSlot(int, str, object)
+    def _set_now_playing(self, row: int, path: str, macro):
+        if 0 <= row < self.playlist_model.rowCount():
+            # Prevent selectionChanged from firing while we move the row programmatically
+            selection_model = self.playlist.selectionModel()
+            selection_model.blockSignals(True)
+            self.playlist.setCurrentIndex(self.playlist_model.index(row, 0))
+            selection_model.blockSignals(False)
+            self.playlist.viewport().update()
+            self._refresh_controls()
+
+        self._set_file_label(f"Playing: {path}")
+        self._set_status(f"Playing playlist… ({STOP_HOTKEY} to stop)")
+        
+        # Set duration for this track
+        self.time_label.setText("0:00")
+        if macro:
+            total_duration = macro[-1].time if macro else 0
+            self.duration_label.setText(self._format_time(total_duration))
+        else:
+            self.duration_label.setText("0:00")
+
+    # ==========================
+    #  Playback Finished
+    # ==========================
+
+    @QtCore.pyqtSlot(object)
+    def _playback_done(self, stop_event):
+        # A stopped job finishing after a newer one was queued: ignore it.
+        if stop_event is not self.stop_event:
+            return
+        self._playing = False
+
+        self.progress.setValue(0)
+        self.time_label.setText("0:00")
+        self.duration_label.setText("0:00")
+        self.is_paused = False
+
+        if self.current_macro:
+            self.play_button.setIcon(create_play_icon(40))
+
+        if self.playlist_mode:
+            self._set_status("Playlist finished or stopped.")
+        else:
+            self._set_status("Ready.")
+
+        self.playlist_mode = False
+        self._refresh_controls()
+
+    # ==========================
+    #  Stop / Panic Hotkey
+    # ==========================
+
+    def on_stop_clicked(self):
+        self.stop_playback()
+        self.play_button.setIcon(create_play_icon(40))
+        self._set_status("Stopped.")
+
+    def stop_playback(self):
+        # play_macro polls the event, so the worker winds down on its own.
+        self.stop_event.set()
+        self._refresh_controls()
+
+    def _on_global_hotkey(self):
+        self.global_hotkey_pressed.emit()
+
+    @QtCore.pyqtSlot()
+    def _global_stop(self):
+        # F11 now plays/pauses instead of stopping
+        # If a macro is loaded, call on_play_clicked to start or toggle pause
+        if self.current_macro:
+            self.on_play_clicked()
+        else:
+            # If no macro loaded, show message
+            self._set_status("No song selected. Click a song in the playlist first.")
+
+    # ==========================
+    #  Close Event
+    # ==========================
+
+    # ==========================
+    #  Playlist Persistence
+    # ==========================
+    
+    def _save_playlist_to_file(self):
+        """Save current playlist to JSON file."""
+        playlist_data = self.playlist_model.paths()
+        
+        try:
+            write_json_atomic(PLAYLIST_FILE, playlist_data)
+            self._set_status(f"✓ Playlist saved ({len(playlist_data)} songs)")
+            print(f"[Playlist] Saved {len(playlist_data)} songs to {PLAYLIST_FILE}")
+        except Exception as e:
+            print(f"Error saving playlist: {e}")
+            self._set_status(f"✗ Error saving playlist: {e}")
+    
+    def load_playlist_from_file(self):
+        """
+        Load playlist from JSON file. The file is read and its tracks
+        checked on a worker thread; the rows are added back on this one.
+        """
+        threading.Thread(target=self._read_saved_playlist, daemon=True).start()
+
+    def _read_saved_playlist(self):
+        paths = []
+        try:
+            if os.path.exists(PLAYLIST_FILE):
+                with open(PLAYLIST_FILE, 'r') as f:
+                    playlist_data = json.load(f)
+                if playlist_data:
+                    exists = files_exist(playlist_data)
+                    paths = [path for path, ok in zip(playlist_data, exists) if ok]
+        except Exception as e:
+            print(f"Error loading playlist: {e}")
+        self.saved_playlist_read.emit(paths)
+
+    @QtCore.pyqtSlot(object)
+    def _apply_saved_playlist(self, paths):
+        if paths:
+            self.add_many_to_playlist(paths, select_first=False)
+        else:
+            # Nothing to load, so no load will finish and reveal the buttons
+            self._show_buttons()
+    
+    def _show_buttons(self):
+        """Show the play buttons and hide the loading indicator."""
+        self.button_stack.setCurrentIndex(1)  # Show button_container
+    
+    def closeEvent(self, event):
+        self.stop_playback()
+        self._job_queue.put(None)
+        self.macro_loader_pool.shutdown(wait=False, cancel_futures=True)
+        self.macro_build_pool.shutdown(wait=False, cancel_futures=True)
+        self.prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        event.accept()
+
+def main():
+    # Let Qt merge bursts of mouse-move and tablet events (default on X11 only).
+    QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_CompressHighFrequencyEvents, True)
+    QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_CompressTabletEvents, True)
+    app = QtWidgets.QApplication(sys.argv)
+
+    # Apply dark Nord theme before creating any windows
+    apply_nord_theme(app)
+
+    # Use the .ico and resource_path
+    icon_path = resource_path("Player.ico")
+    app.setWindowIcon(QtGui.QIcon(icon_path))
+
+    w = MainWindow()
+
+    # Try to make the native title bar dark on Windows
+    enable_windows_dark_titlebar(w)
+
+    # Explicitly set the window icon too
+    w.setWindowIcon(QtGui.QIcon(icon_path))
+
+    # Window positioning is handled in MainWindow.__init__ via _position_on_secondary_monitor()
+    sys.exit(app.exec_())
+
+if __name__ == "__main__":
+     # main.py is the usual entry point. Run directly, this module is what
+     # spawned workers re-import, so they pay for PyQt5 and keyboard too.
+     multiprocessing.freeze_support()
+     main()